@@ -0,0 +1,266 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+# ==========================================
+# Lab02 CC (Calculation on the coordinates) golden generator
+#
+# 每個 pattern 4 個點 (x, y)，皆為 8-bit signed，以 (N, 4, 2) 的 batch 處理：
+#   mode 0 : 梯形 (xul, yu) (xur, yu) (xdl, yd) (xdr, yd)，由下而上、由左而右輸出涵蓋的所有格點
+#            第 k 列 (y = yd + k) 的左右界 = xdl + floor((xul - xdl) k / (yu - yd))，右界同理
+#   mode 1 : 直線 AB 與圓 (圓心 C、圓上一點 D) 的關係，座標限 6-bit
+#            cross(AB, AC)^2 與 |AB|^2 |CD|^2 比大小 -> 0 不相交、1 相交、2 相切
+#   mode 2 : 四邊形 ABCD 面積 = |shoelace| / 2 (無條件捨去)，16-bit 輸出
+#
+# 產生的檔案與 pattern.v 讀取的格式相同 (CRLF)：
+#   input.txt           mode 0 輸入，每點一行 "XXYY" (hex)
+#   ans.txt             mode 0 輸出點，每點一行 "XXYY" (hex)
+#   golden_out_num.txt  mode 0 每個 pattern 的輸出點數
+#   coordinate_in.txt   mode 1 輸入，每個數字一行 (十進位)
+#   coordinate_out.txt  mode 1 結果
+#   area_in.txt         mode 2 輸入，每個數字一行 (十進位)
+#   area_out.txt        mode 2 面積
+# 每行一律以 CRLF 結尾；repo 裡的 area_in.txt / area_out.txt 最後一行沒有換行，
+# 所以 --from-input 重算的 area_out.txt 只差在最後的 CRLF，其餘答案檔完全相同。
+# ==========================================
+SEED = 1234
+NUM_PATTERNS = {0: 17, 1: 119, 2: 94}   # pattern.v 目前寫死的筆數
+
+COORD_MIN, COORD_MAX = -128, 127
+MODE1_MIN, MODE1_MAX = -32, 31          # Spec：mode 1 座標限 6-bit
+CORNER_RATE = 0.25                      # 直接抽邊界值 (-128, -1, 0, 127 ...) 的比例
+TANGENT_RATE = 0.2                      # mode 1 刻意造出相切的比例
+CHUNK = 1 << 12                         # mode 0 每次展開的 pattern 數
+
+FILES = {
+    0: ("input.txt", "ans.txt", "golden_out_num.txt"),
+    1: ("coordinate_in.txt", "coordinate_out.txt"),
+    2: ("area_in.txt", "area_out.txt"),
+}
+
+_HEX = np.frombuffer(b"".join(b"%02X" % v for v in range(256)), dtype=np.uint8).reshape(256, 2)
+_DEC = {}
+
+
+def _dec_table(lo, hi):
+    key = (lo, hi)
+    if key not in _DEC:
+        _DEC[key] = [b"%d\r\n" % v for v in range(lo, hi + 1)]
+    return _DEC[key]
+
+
+# ==========================================
+# Golden
+# ==========================================
+def trapezoid_points(pts):
+    """
+    pts    : (N, 4, 2)
+    return : xs, ys (M,) 依 pattern、由下而上、由左而右排列的所有輸出點；counts (N,) 每個 pattern 的點數
+    """
+    p = np.asarray(pts, dtype=np.int64)
+    xul, yu, xur = p[:, 0, 0], p[:, 0, 1], p[:, 1, 0]
+    xdl, yd, xdr = p[:, 2, 0], p[:, 2, 1], p[:, 3, 0]
+    h = yu - yd
+    rows = h + 1
+
+    pat = np.repeat(np.arange(len(p)), rows)
+    k = np.arange(len(pat)) - np.repeat(np.cumsum(rows) - rows, rows)
+    y = yd[pat] + k
+    left = xdl[pat] + (xul - xdl)[pat] * k // h[pat]
+    right = xdr[pat] + (xur - xdr)[pat] * k // h[pat]
+    width = right - left + 1
+
+    row = np.repeat(np.arange(len(y)), width)
+    off = np.arange(len(row)) - np.repeat(np.cumsum(width) - width, width)
+    counts = np.bincount(pat, weights=width, minlength=len(p)).astype(np.int64)
+    return left[row] + off, y[row], counts
+
+
+def circle_line(pts):
+    """pts (N, 4, 2) = A, B, C, D -> (N,) 0 不相交、1 相交、2 相切"""
+    p = np.asarray(pts, dtype=np.int64)
+    a, b, c, d = p[:, 0], p[:, 1], p[:, 2], p[:, 3]
+    ab, ac, cd = b - a, c - a, d - c
+    cross = ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]
+    lhs = cross * cross
+    rhs = (ab * ab).sum(axis=1) * (cd * cd).sum(axis=1)
+    return np.where(lhs > rhs, 0, np.where(lhs == rhs, 2, 1))
+
+
+def quad_area(pts):
+    """pts (N, 4, 2) -> (N,) |shoelace| / 2 (捨去)"""
+    p = np.asarray(pts, dtype=np.int64)
+    x, y = p[:, :, 0], p[:, :, 1]
+    s = (x * np.roll(y, -1, axis=1) - y * np.roll(x, -1, axis=1)).sum(axis=1)
+    return np.abs(s) // 2
+
+
+# ==========================================
+# Stimulus
+# ==========================================
+def draw_coords(rng, shape, lo, hi, corner_rate=CORNER_RATE):
+    """[lo, hi] 均勻亂數，其中 corner_rate 比例換成有號數的邊界值"""
+    v = rng.integers(lo, hi + 1, shape)
+    corners = np.array([lo, lo + 1, -2, -1, 0, 1, hi - 1, hi])
+    pick = rng.random(shape) < corner_rate
+    v[pick] = rng.choice(corners, int(pick.sum()))
+    return v
+
+
+def draw_trapezoids(rng, num, max_span=COORD_MAX - COORD_MIN):
+    """yd < yu、xdl <= xdr、xul <= xur；max_span 限制高度與上下底寬度 (控制輸出點數)"""
+    y = draw_coords(rng, (num, 2), COORD_MIN, COORD_MAX)
+    while True:
+        same = y[:, 0] == y[:, 1]
+        if not same.any():
+            break
+        y[same] = draw_coords(rng, (int(same.sum()), 2), COORD_MIN, COORD_MAX)
+    y.sort(axis=1)
+    x = np.sort(draw_coords(rng, (num, 2, 2), COORD_MIN, COORD_MAX), axis=2)   # [上底, 下底] x [左, 右]
+    y[:, 1] = np.minimum(y[:, 1], y[:, 0] + max_span)
+    x[:, :, 1] = np.minimum(x[:, :, 1], x[:, :, 0] + max_span)
+
+    pts = np.empty((num, 4, 2), dtype=np.int64)
+    pts[:, 0] = np.stack([x[:, 0, 0], y[:, 1]], axis=1)
+    pts[:, 1] = np.stack([x[:, 0, 1], y[:, 1]], axis=1)
+    pts[:, 2] = np.stack([x[:, 1, 0], y[:, 0]], axis=1)
+    pts[:, 3] = np.stack([x[:, 1, 1], y[:, 0]], axis=1)
+    return pts
+
+
+def draw_circle_line(rng, num, tangent_rate=TANGENT_RATE):
+    """
+    A != B、C != D 的隨機點；其中 tangent_rate 比例直接造出相切：
+    D 取在直線 AB 的格點上，C = D + s * AB 的法向量，則 C 到直線的垂足正好是 D
+    """
+    lo, hi = MODE1_MIN, MODE1_MAX
+    pts = draw_coords(rng, (num, 4, 2), lo, hi)
+
+    tan = np.flatnonzero(rng.random(num) < tangent_rate)
+    a = pts[tan, 0]
+    step = rng.integers(-4, 5, (len(tan), 2))
+    t = rng.integers(-3, 4, len(tan))
+    s = rng.integers(1, 4, len(tan)) * rng.choice([-1, 1], len(tan))
+    d = a + t[:, None] * step
+    c = d + s[:, None] * np.stack([-step[:, 1], step[:, 0]], axis=1)
+    ok = (step != 0).any(axis=1) & ((c >= lo) & (c <= hi) & (d >= lo) & (d <= hi)).all(axis=1)
+    ok &= ((a + step >= lo) & (a + step <= hi)).all(axis=1)
+    tan, a, step, c, d = tan[ok], a[ok], step[ok], c[ok], d[ok]
+    pts[tan, 1] = a + step
+    pts[tan, 2] = c
+    pts[tan, 3] = d
+
+    # 退化的直線 / 半徑為 0 的圓重抽
+    while True:
+        bad = (pts[:, 0] == pts[:, 1]).all(axis=1) | (pts[:, 2] == pts[:, 3]).all(axis=1)
+        if not bad.any():
+            return pts
+        pts[bad] = draw_coords(rng, (int(bad.sum()), 4, 2), lo, hi)
+
+
+def draw_quads(rng, num):
+    return draw_coords(rng, (num, 4, 2), COORD_MIN, COORD_MAX)
+
+
+# ==========================================
+# 檔案輸出
+# ==========================================
+def hex_lines(xs, ys):
+    """(M,) 座標 -> "XXYY\r\n" * M"""
+    buf = np.empty((len(xs), 6), dtype=np.uint8)
+    buf[:, 0:2] = _HEX[np.asarray(xs) & 0xFF]
+    buf[:, 2:4] = _HEX[np.asarray(ys) & 0xFF]
+    buf[:, 4] = ord("\r")
+    buf[:, 5] = ord("\n")
+    return buf.tobytes()
+
+
+def dec_lines(values, lo, hi):
+    table = _dec_table(lo, hi)
+    return b"".join([table[v - lo] for v in np.asarray(values).ravel().tolist()])
+
+
+def read_hex_input(path):
+    """input.txt ("XXYY" 每行一點) -> (N, 4, 2) signed"""
+    with open(path) as f:
+        v = np.array([int(t, 16) for t in f.read().split()], dtype=np.int64)
+    xy = np.stack([v >> 8, v & 0xFF], axis=1)
+    return ((xy ^ 0x80) - 0x80).reshape(-1, 4, 2)
+
+
+def read_dec_input(path):
+    """coordinate_in.txt / area_in.txt (每行一個十進位) -> (N, 4, 2)"""
+    with open(path) as f:
+        return np.array(f.read().split(), dtype=np.int64).reshape(-1, 4, 2)
+
+
+def write_mode0(pts, out_dir, chunk=CHUNK, write_input=True):
+    """mode 0 的輸出點可能很多，分段展開、直接寫檔；回傳總點數"""
+    f_in, f_ans, f_num = (os.path.join(out_dir, n) for n in FILES[0])
+    if write_input:
+        with open(f_in, "wb") as f:
+            f.write(hex_lines(pts[:, :, 0].ravel(), pts[:, :, 1].ravel()))
+    total = 0
+    with open(f_ans, "wb") as fa, open(f_num, "wb") as fn:
+        for s in range(0, len(pts), chunk):
+            xs, ys, counts = trapezoid_points(pts[s:s + chunk])
+            fa.write(hex_lines(xs, ys))
+            fn.write(b"".join(b"%d\r\n" % n for n in counts.tolist()))
+            total += len(xs)
+    return total
+
+
+def write_pairs(mode, pts, results, out_dir, res_range, write_input=True):
+    f_in, f_out = (os.path.join(out_dir, n) for n in FILES[mode])
+    if write_input:
+        with open(f_in, "wb") as f:
+            f.write(dec_lines(pts, COORD_MIN, COORD_MAX))
+    with open(f_out, "wb") as f:
+        f.write(dec_lines(results, *res_range))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab02 CC golden generator")
+    parser.add_argument("--mode0", type=int, default=NUM_PATTERNS[0], help="mode 0 (梯形) pattern 數")
+    parser.add_argument("--mode1", type=int, default=NUM_PATTERNS[1], help="mode 1 (圓與直線) pattern 數")
+    parser.add_argument("--mode2", type=int, default=NUM_PATTERNS[2], help="mode 2 (面積) pattern 數")
+    parser.add_argument("--max-span", type=int, default=COORD_MAX - COORD_MIN, help="mode 0 梯形的最大高度 / 寬度")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--from-input", action="store_true", help="沿用現有的 3 個輸入檔，只重算答案")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+    if args.max_span < 1:
+        parser.error("--max-span 至少要 1 (梯形高度 yu - yd 不能為 0)")
+    if min(args.mode0, args.mode1, args.mode2) < 1:
+        parser.error("--mode0 / --mode1 / --mode2 至少要 1 筆 (pattern.v 三個 mode 都會跑)")
+
+    rng = np.random.default_rng(args.seed)
+    new = not args.from_input
+    path = {m: os.path.join(args.out_dir, FILES[m][0]) for m in FILES}
+    t0 = time.time()
+
+    pts0 = draw_trapezoids(rng, args.mode0, args.max_span) if new else read_hex_input(path[0])
+    total0 = write_mode0(pts0, args.out_dir, write_input=new)
+    print(f"mode 0: {len(pts0)} 筆梯形，共 {total0} 個輸出點")
+
+    pts1 = draw_circle_line(rng, args.mode1) if new else read_dec_input(path[1])
+    res1 = circle_line(pts1)
+    write_pairs(1, pts1, res1, args.out_dir, (0, 2), write_input=new)
+    print(f"mode 1: {len(pts1)} 筆 (不相交 / 相交 / 相切 = {' / '.join(map(str, np.bincount(res1, minlength=3)))})")
+
+    pts2 = draw_quads(rng, args.mode2) if new else read_dec_input(path[2])
+    area = quad_area(pts2)
+    write_pairs(2, pts2, area, args.out_dir, (0, (COORD_MAX - COORD_MIN) ** 2), write_input=new)
+    print(f"mode 2: {len(pts2)} 筆，最大面積 {int(area.max()) if len(area) else 0}")
+
+    print(f"完成，耗時 {time.time() - t0:.2f} s")
+    counts = (len(pts0), len(pts1), len(pts2))
+    if counts != (NUM_PATTERNS[0], NUM_PATTERNS[1], NUM_PATTERNS[2]):
+        print(f"[INFO] pattern.v 的筆數需改成：`define PAT_NUM {counts[0]}、golden_out_num[0:{counts[0] - 1}]、"
+              f"mode 1 迴圈 {counts[1]}、mode 2 迴圈 {counts[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import time
+
+import numpy as np
+
+# ==========================================
+# Lab01 SMC (Supper MOSFET Calculator) golden model
+#
+# 每個 pattern 有 6 顆 MOS，各自的 (W, V_GS, V_DS) 皆為 1 ~ 7：
+#   V_GS - 1 >  V_DS (triode)     : ID = W [2 (V_GS - 1) V_DS - V_DS^2] / 3，gm = 2 W V_DS / 3
+#   V_GS - 1 <= V_DS (saturation) : ID = W (V_GS - 1)^2 / 3，              gm = 2 W (V_GS - 1) / 3
+#   (皆無條件捨去)
+# mode[0] 選 ID (1) 或 gm (0)，6 個值由大到小排成 n0 ~ n5：
+#   mode[1] = 1 : ID -> (3 n0 + 4 n1 + 5 n2) / 12，gm -> (n0 + n1 + n2) / 3
+#   mode[1] = 0 : ID -> (3 n3 + 4 n4 + 5 n5) / 12，gm -> (n3 + n4 + n5) / 3
+#
+# 輸入一律是 (N, 6, 3) 的 batch (最後一維為 W, V_GS, V_DS)，4 個 mode 一次算完。
+# 註：smc.v 目前以 if (mode) 判斷大 / 小 (mode = 2'b01 會走 larger)，
+#     且 smaller 的 ID 權重套在 (n5, n4, n3) 上，與 Spec 不同；此模型依 Spec。
+# ==========================================
+NUM_MOS = 6
+VALUE_MIN = 1
+VALUE_MAX = 7
+NUM_MODES = 4
+SEED = 1234
+
+INPUT_FILE = "input.txt"
+OUTPUT_FILE = "output.txt"
+
+
+def id_gm(x):
+    """
+    x      : (..., 3) 的 (W, V_GS, V_DS)
+    return : ID, gm (...,)，皆已捨去成整數
+    """
+    x = np.asarray(x, dtype=np.int32)
+    w, vgs, vds = x[..., 0], x[..., 1], x[..., 2]
+    ov = vgs - 1
+    triode = ov > vds
+    a = np.where(triode, 2 * ov * vds - vds * vds, ov * ov)
+    b = np.where(triode, vds, ov)
+    return w * a // 3, 2 * w * b // 3
+
+
+def smc_all_modes(x):
+    """
+    x      : (N, 6, 3)
+    return : (N, 4) uint8，第 m 欄為 mode = m 時的 out_n
+    """
+    i_d, gm = id_gm(x)
+    out = np.empty((len(i_d), NUM_MODES), dtype=np.uint8)
+    for cur, vals in ((0, gm), (1, i_d)):
+        n = -np.sort(-vals, axis=1)   # n0 ~ n5 由大到小
+        for larger in (0, 1):
+            top = n[:, :3] if larger else n[:, 3:]
+            if cur:
+                res = (3 * top[:, 0] + 4 * top[:, 1] + 5 * top[:, 2]) // 12
+            else:
+                res = top.sum(axis=1) // 3
+            out[:, larger << 1 | cur] = res
+    return out
+
+
+def smc(x, mode):
+    """x (N, 6, 3)、mode (N,) -> out_n (N,)"""
+    return smc_all_modes(x)[np.arange(len(x)), np.asarray(mode)]
+
+
+# ==========================================
+# Stimulus
+# ==========================================
+def random_patterns(num, seed=SEED):
+    rng = np.random.default_rng(seed)
+    x = rng.integers(VALUE_MIN, VALUE_MAX + 1, (num, NUM_MOS, 3), dtype=np.uint8)
+    mode = rng.integers(0, NUM_MODES, num, dtype=np.uint8)
+    return x, mode
+
+
+def transistor_combos():
+    """一顆 MOS 所有的 (W, V_GS, V_DS)，共 7^3 = 343 種"""
+    r = np.arange(VALUE_MIN, VALUE_MAX + 1, dtype=np.uint8)
+    return np.stack(np.meshgrid(r, r, r, indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def exhaustive_patterns(seed=SEED):
+    """
+    逐顆 MOS 掃過 343 種組合 x 4 個 mode，其餘 5 顆固定為同一組隨機背景
+    return : x (6 * 343 * 4, 6, 3)、mode
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.integers(VALUE_MIN, VALUE_MAX + 1, (NUM_MOS, 3), dtype=np.uint8)
+    combos = transistor_combos()
+    x = np.broadcast_to(base, (NUM_MOS, len(combos), NUM_MODES, NUM_MOS, 3)).copy()
+    for slot in range(NUM_MOS):
+        x[slot, :, :, slot] = combos[:, None, :]
+    mode = np.broadcast_to(np.arange(NUM_MODES, dtype=np.uint8), x.shape[:3])
+    return x.reshape(-1, NUM_MOS, 3), mode.reshape(-1)
+
+
+# ==========================================
+# 檔案輸出 (pattern.v 以 $fscanf("%d") 讀取)
+# ==========================================
+def input_bytes(x, mode):
+    """
+    每個 pattern 固定 39 bytes：mode 一行、6 行 "W V_GS V_DS"、一行空白
+    所有數字都是個位數，直接排成 (N, 39) 的 byte 陣列
+    """
+    num = len(x)
+    buf = np.empty((num, 39), dtype=np.uint8)
+    buf[:, 0] = np.asarray(mode) + ord("0")
+    buf[:, 1] = ord("\n")
+    rows = buf[:, 2:38].reshape(num, NUM_MOS, 6)
+    rows[:, :, 0:6:2] = np.asarray(x) + ord("0")
+    rows[:, :, 1:5:2] = ord(" ")
+    rows[:, :, 5] = ord("\n")
+    buf[:, 38] = ord("\n")
+    return b"%d\n\n" % num + buf.tobytes()
+
+
+def read_input(path):
+    """input.txt -> x (N, 6, 3)、mode (N,)"""
+    with open(path) as f:
+        vals = np.array(f.read().split(), dtype=np.int64)
+    num = int(vals[0])
+    pats = vals[1:1 + num * 19].reshape(num, 19)
+    return pats[:, 1:].reshape(num, NUM_MOS, 3), pats[:, 0]
+
+
+_DEC = [b"%d\n" % v for v in range(256)]
+
+
+def output_bytes(out_n):
+    return b"".join([_DEC[v] for v in np.asarray(out_n).tolist()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab01 SMC golden / stimulus generator")
+    parser.add_argument("--pat-num", type=int, default=40, help="隨機 pattern 數")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--exhaustive", action="store_true", help="逐顆 MOS 掃過全部 343 種輸入 x 4 個 mode")
+    parser.add_argument("--from-input", action="store_true", help="沿用現有的 input.txt，只重算 output.txt")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+    if args.pat_num < 1:
+        parser.error("--pat-num 至少要 1")
+
+    t0 = time.time()
+    if args.from_input:
+        x, mode = read_input(args.input)
+    elif args.exhaustive:
+        x, mode = exhaustive_patterns(args.seed)
+    else:
+        x, mode = random_patterns(args.pat_num, args.seed)
+    out_n = smc(x, mode)
+    if not args.from_input:
+        with open(args.input, "wb") as f:
+            f.write(input_bytes(x, mode))
+    with open(args.output, "wb") as f:
+        f.write(output_bytes(out_n))
+    print(f"成功！已產生 {len(x)} 筆 pattern 寫入 {args.input} / {args.output}，耗時 {time.time() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,17 @@
 import numpy as np
 import os
+import sys
+
+# SNN 黃金模型與 hex 輸出與 lab8 共用 (lab8/snn_golden.py, lab8/hex_emit.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab8"))
+import snn_golden as snn
+from hex_emit import hex_lines, write_hex_file
 
 # ============================================================
 # 固定 seed
 # ============================================================
 np.random.seed(1234)
 
-# ============================================================
-# 工具：float32 → IEEE754 Hex
-# ============================================================
-def float32_to_hex(f):
-    return format(np.frombuffer(np.float32(f).tobytes(), dtype=np.uint32)[0], '08x')
-
-
 # ============================================================
 # 資料生成
 # ============================================================
@@ -32,70 +31,79 @@ weight = gen_weight()
 
 
 # ============================================================
-# Padding
+# 子網路完整流程 (lab4：無 equalization、整張 max pooling)
 # ============================================================
-def replication_pad(img):
-    return np.pad(img, ((1,1),(1,1),(0,0)), mode='edge')
+PAD_TYPE = {"replication": 0, "zero": 1}
+ACT_TYPE = {"sigmoid": 0, "tanh": 1}
 
-def zero_pad(img):
-    return np.pad(img, ((1,1),(1,1),(0,0)), mode='constant')
+def simulate_batch(imgs, kernels, weight, pad_mode, act):
+    """
+    imgs    : (N, 4, 4, 3)
+    kernels : (N, 3, 3, 3)
+    return  : (N, 4) enc，等同 snn.snn_forward(..., cfg=snn.LAB4)
+    """
+    x = imgs
+    for _, _, stage_fn in SNN_STAGES:
+        x = stage_fn(x, kernels, weight, pad_mode, act)
+    return x
 
 
 # ============================================================
-# Conv (cross-correlation)
+# Batch 各 stage (x 為上一個 stage 的輸出)
 # ============================================================
-def conv2d_crosscorr(img, kernel):
-    H, W, C = img.shape
-    kh, kw, kc = kernel.shape
-    outH = H - kh + 1
-    outW = W - kw + 1
-    out = np.zeros((outH, outW), dtype=np.float32)
+def pad_stage(x, kernels, weight, pad_mode, act):
+    return snn.pad_batch(x, PAD_TYPE[pad_mode])
 
-    for i in range(outH):
-        for j in range(outW):
-            patch = img[i:i+kh, j:j+kw, :]
-            out[i,j] = np.sum(patch * kernel)
-    return out
+def conv_stage(x, kernels, weight, pad_mode, act):
+    return snn.conv_batch(x, kernels, snn.LAB4["conv"])
 
+def pool_fc_norm_stage(x, kernels, weight, pad_mode, act):
+    pooled = snn.pool_batch(x, snn.LAB4["pool"])
+    fc = snn.fc_batch(pooled, weight, snn.LAB4["fc"])
+    return snn.normalize_batch(fc, snn.LAB4["norm"])
 
-# ============================================================
-# Max pooling 2x2
-# ============================================================
-def max_pool_2x2(x):
-    return np.max(x)
+def act_stage(x, kernels, weight, pad_mode, act):
+    return snn.activate_batch(x, ACT_TYPE[act])
 
 
-# ============================================================
-# Min-max normalization
-# ============================================================
-def min_max_normalize(vec):
-    mn, mx = vec.min(), vec.max()
-    if np.isclose(mn, mx): return np.zeros_like(vec)
-    return (vec - mn) / (mx - mn)
+# (stage 名稱, 此 stage 依賴的選項, stage 函式)
+# 依賴的選項決定 DAG 的分岔點：pad 之後才分 pad_mode，act 才分 sigmoid/tanh
+SNN_STAGES = [
+    ("pad",  "pad_mode", pad_stage),
+    ("conv", None,       conv_stage),
+    ("norm", None,       pool_fc_norm_stage),
+    ("act",  "act",      act_stage),
+]
 
 
-# ============================================================
-# Activation
-# ============================================================
-sigmoid = lambda x: 1 / (1 + np.exp(-x))
-tanh = lambda x: np.tanh(x)
+def simulate_opts_dag(imgs, kernels, weight, opt_table, stats=None):
+    """
+    一次算完 opt_table 裡所有 OPT 的 enc。
 
+    把每個 OPT 的 stage 序列看成一條路徑，路徑上的節點以
+    「到目前為止影響結果的選項值」為 key，相同前綴只算一次再分岔：
+    4 個 OPT 下 pad/conv/norm 各跑 2 次、act 跑 4 次。
 
-# ============================================================
-# 子網路完整流程
-# ============================================================
-def simulate(img, kernel, weight, pad_mode, act):
-    padded = replication_pad(img) if pad_mode == "replication" else zero_pad(img)
-    feat = conv2d_crosscorr(padded, kernel)
-    pooled = max_pool_2x2(feat)
-    fc = pooled * weight
-    flat = fc.reshape(-1)
-    norm = min_max_normalize(flat)
+    opt_table : {opt: (act, pad_mode)}，同 opts
+    stats     : 可選 dict，回填每個 stage 實際執行次數
+    return    : {opt: (N, 4) enc}
+    """
+    cache = {(): imgs}
+    results = {}
 
-    act_fn = sigmoid if act == "sigmoid" else tanh
-    enc = act_fn(norm).astype(np.float32)
+    for opt, (act, pad_mode) in opt_table.items():
+        choice = {"pad_mode": pad_mode, "act": act}
+        key = ()
+        for name, dep, stage_fn in SNN_STAGES:
+            parent = cache[key]
+            key = key + ((name, choice[dep] if dep else None),)
+            if key not in cache:
+                cache[key] = stage_fn(parent, kernels, weight, pad_mode, act)
+                if stats is not None:
+                    stats[name] = stats.get(name, 0) + 1
+        results[opt] = cache[key]
 
-    return enc
+    return results
 
 
 # ============================================================
@@ -118,40 +126,32 @@ os.makedirs("gold_output", exist_ok=True)
 # ============================================================
 # RAW memory data 輸出
 # ============================================================
-with open("gold_output/image_data.mem", "w") as f:
-    for v in imgs.reshape(-1):
-        f.write("0x" + float32_to_hex(v) + "\n")
-
-with open("gold_output/kernel_data.mem", "w") as f:
-    for v in kernel.reshape(-1):
-        f.write("0x" + float32_to_hex(v) + "\n")
-
-with open("gold_output/weight_data.mem", "w") as f:
-    for v in weight.reshape(-1):
-        f.write("0x" + float32_to_hex(v) + "\n")
+write_hex_file("gold_output/image_data.mem", imgs, prefix="0x")
+write_hex_file("gold_output/kernel_data.mem", kernel, prefix="0x")
+write_hex_file("gold_output/weight_data.mem", weight, prefix="0x")
 
 
 # ============================================================
 # Gold patterns (enc1, enc2, L1)
 # ============================================================
+kernels = np.broadcast_to(kernel, (len(imgs),) + kernel.shape)
+encs = simulate_opts_dag(imgs, kernels, weight, opts)
+
 for opt in range(4):
     act, pad = opts[opt]
-    enc1 = simulate(imgs[0], kernel, weight, pad, act)
-    enc2 = simulate(imgs[1], kernel, weight, pad, act)
+    enc1, enc2 = encs[opt]
     L1 = np.sum(np.abs(enc1 - enc2))
 
-    with open(f"gold_output/gold_opt{opt}.txt", "w") as f:
-        f.write(f"OPT={opt} ({act},{pad})\n\n")
+    with open(f"gold_output/gold_opt{opt}.txt", "wb") as f:
+        f.write(f"OPT={opt} ({act},{pad})\n\n".encode())
 
-        f.write("=== enc1 ===\n")
-        for v in enc1:
-            f.write("0x" + float32_to_hex(v) + "\n")
+        f.write(b"=== enc1 ===\n")
+        f.write(hex_lines(enc1, prefix="0x"))
 
-        f.write("\n=== enc2 ===\n")
-        for v in enc2:
-            f.write("0x" + float32_to_hex(v) + "\n")
+        f.write(b"\n=== enc2 ===\n")
+        f.write(hex_lines(enc2, prefix="0x"))
 
-        f.write("\n=== L1 ===\n")
-        f.write("0x" + float32_to_hex(np.float32(L1)) + "\n")
+        f.write(b"\n=== L1 ===\n")
+        f.write(hex_lines(np.float32(L1), prefix="0x"))
 
 print("✨ Gold pattern generation done → gold_output/")
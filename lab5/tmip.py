@@ -1,116 +1,426 @@
 import numpy as np
-from scipy.ndimage import median_filter
-import random
 import os
+import argparse
+import itertools
+from collections import deque
+from multiprocessing import Pool
 
-def generate_pattern(pat_idx):
-    print(f"========== Generating Pattern {pat_idx} ==========")
-    
-    # 1. 隨機生成初始測資
-    size_idx = random.randint(0, 2)
-    dim = {0: 4, 1: 8, 2: 16}[size_idx]
-    
-    R = np.random.randint(0, 256, (dim, dim), dtype=np.uint8)
-    G = np.random.randint(0, 256, (dim, dim), dtype=np.uint8)
-    B = np.random.randint(0, 256, (dim, dim), dtype=np.uint8)
-    template = np.random.randint(0, 256, (3, 3), dtype=np.uint8)
-    
-    # 分開儲存各類資料
-    img_data = [size_idx]
-    tpl_data = []
-    act_data = []
-    golden_data = []
-    
-    # R, G, B 交錯排列 (Raster scan)
-    for i in range(dim):
-        for j in range(dim):
-            img_data.extend([R[i, j], G[i, j], B[i, j]])
-            
-    tpl_data.extend(template.flatten().tolist())
-    
-    current_img = np.zeros((dim, dim), dtype=np.uint32)
-    
-    # 2. 生成 8 個 Set
+# ==========================================
+# Batch 引擎：同樣 dim 的 pattern 疊成 (N, dim, dim) 一起算
+# ==========================================
+DIMS = {0: 4, 1: 8, 2: 16}
+SEED = 1234
+
+def pattern_rng(seed, pat_idx):
+    # 每個 pattern 有自己的亂數串流，只由 (seed, pat_idx) 決定，
+    # 單獨重跑某個 pattern 或分給不同 process 產生結果都一樣
+    return np.random.default_rng([seed, pat_idx])
+
+def draw_images(rng, dim):
+    R = rng.integers(0, 256, (dim, dim), dtype=np.uint8)
+    G = rng.integers(0, 256, (dim, dim), dtype=np.uint8)
+    B = rng.integers(0, 256, (dim, dim), dtype=np.uint8)
+    template = rng.integers(0, 256, (3, 3), dtype=np.uint8)
+    return R, G, B, template
+
+def draw_pattern(pat_idx, seed=SEED):
+    """
+    只抽亂數不計算，golden 交給 golden_batch 一次算。
+    return : size_idx, R, G, B, template, 8 個 set 的 action list
+    """
+    rng = pattern_rng(seed, pat_idx)
+
+    size_idx = int(rng.integers(0, 3))
+    R, G, B, template = draw_images(rng, DIMS[size_idx])
+
+    sets = []
     for set_idx in range(8):
-        print(f"--- Set {set_idx} ---")
-        num_actions = random.randint(2, 8)
-        act_first = random.randint(0, 2)
+        num_actions = int(rng.integers(2, 9))
+        act_first = int(rng.integers(0, 3))
         act_last = 7
-        act_mid = [random.randint(3, 6) for _ in range(num_actions - 2)]
-        actions = [act_first] + act_mid + [act_last]
-        
-        # 寫入 Action 數量與內容
-        act_data.append(num_actions)
+        act_mid = rng.integers(3, 7, num_actions - 2).tolist()
+        sets.append([act_first] + act_mid + [act_last])
+
+    return size_idx, R, G, B, template, sets
+
+def describe_pattern(pat_idx, pattern):
+    # 原本逐 set 印出的內容 (--verbose 才印)
+    lines = [f"========== Generating Pattern {pat_idx} =========="]
+    for set_idx, actions in enumerate(pattern[5]):
+        lines.append(f"--- Set {set_idx} ---")
+        lines.append(f"Actions: {actions}")
+    return "\n".join(lines) + "\n"
+
+def _shifted_3x3(padded, dim):
+    # padded: (N, dim+2, dim+2) -> 9 個 (N, dim, dim) 的平移視圖 (raster 順序)
+    return [padded[:, i:i + dim, j:j + dim] for i in range(3) for j in range(3)]
+
+# ==========================================
+# 3x3 Median：與 median.v / sort.v 相同的 compare-exchange 網路
+# ==========================================
+def sort3(d0, d1, d2):
+    # 同 SORT3
+    l1_min = np.minimum(d0, d1)
+    l1_max = np.maximum(d0, d1)
+    min_out = np.minimum(l1_min, d2)
+    l2_max = np.maximum(l1_min, d2)
+    return min_out, np.minimum(l1_max, l2_max), np.maximum(l1_max, l2_max)
+
+def median9(p, stages=None):
+    """
+    p      : 9 個同 shape 的陣列 (p0 ~ p8，3x3 window 的 raster 順序)
+    stages : 可選 dict，回填 MEDIAN9 內部各條線的值 (可與 RTL 波形對照)
+    """
+    min0, mid0, max0 = sort3(p[0], p[1], p[2])
+    min1, mid1, max1 = sort3(p[3], p[4], p[5])
+    min2, mid2, max2 = sort3(p[6], p[7], p[8])
+
+    max_min = np.maximum(np.maximum(min0, min1), min2)
+    min_max = np.minimum(np.minimum(max0, max1), max2)
+    _, med_mid, _ = sort3(mid0, mid1, mid2)
+    _, median_val, _ = sort3(max_min, med_mid, min_max)
+
+    if stages is not None:
+        stages.update(min0=min0, mid0=mid0, max0=max0,
+                      min1=min1, mid1=mid1, max1=max1,
+                      min2=min2, mid2=mid2, max2=max2,
+                      max_min=max_min, min_max=min_max, med_mid=med_mid)
+    return median_val
+
+def gray_batch(R, G, B):
+    """三種灰階 (action 0 / 1 / 2) 只跟 R, G, B 有關，每個 pattern 算一次給所有 set 共用"""
+    R32, G32, B32 = R.astype(np.uint32), G.astype(np.uint32), B.astype(np.uint32)
+    return (np.maximum(np.maximum(R32, G32), B32),   # Gray Max
+            (R32 + G32 + B32) // 3,                  # Gray Avg
+            R32 // 4 + G32 // 2 + B32 // 4)          # Gray Weighted
+
+# ==========================================
+# Action 編譯：把每個 set 的 action list 化簡成等價的最短 plan
+# ==========================================
+# 化簡規則 (結果與逐步執行完全相同)：
+#   - 5 (flip) 與 3 / 4 / 6 都可交換 -> 全部移到 7 前面，只留奇偶
+#   - 4 (negative) 與 5 / 6 可交換、與 3 不可交換 -> 每段 pooling 之間只留奇偶
+#   - 3 (pooling) 在 4x4 上不動 -> 刪掉
+#   - 6 (median) 不可省略，順序保留
+def compile_actions(actions, dim):
+    """
+    actions : 一個 set 的 action list ([gray] + mid + [7])
+    dim     : 原始影像大小
+    return  : 化簡後的 action tuple，可直接當作 dedup 用的 canonical key
+    """
+    plan = [actions[0]]
+    flip = neg = 0
+    for act in actions[1:-1]:
+        if act == 3:
+            if dim > 4:
+                plan += [4] * neg + [3]
+                neg = 0
+                dim //= 2
+        elif act == 4:
+            neg ^= 1
+        elif act == 5:
+            flip ^= 1
+        else:
+            plan.append(act)
+    plan += [4] * neg + [5] * flip + [actions[-1]]
+    return tuple(plan)
+
+def apply_action_batch(act, imgs, gray, template):
+    """
+    imgs     : (N, d, d) uint32，目前的影像 (gray 之前為 None)
+    gray     : gray_batch() 的結果 (這 N 個 pattern)
+    template : (N, 3, 3)
+    """
+    if act in (0, 1, 2):
+        return gray[act]
+
+    n, d, _ = imgs.shape
+    if act == 3:   # Max Pooling (4x4 不動)
+        if d > 4:
+            return imgs.reshape(n, d // 2, 2, d // 2, 2).max(axis=(2, 4))
+        return imgs
+    if act == 4:   # Negative
+        return 255 - imgs
+    if act == 5:   # Horizontal Flip
+        return imgs[:, :, ::-1]
+    if act == 6:   # Median Filter (Replication Padding)
+        padded = np.pad(imgs, ((0, 0), (1, 1), (1, 1)), mode='edge')
+        return median9(_shifted_3x3(padded, d))
+    if act == 7:   # Cross Correlation (Zero Padding)
+        padded = np.pad(imgs, ((0, 0), (1, 1), (1, 1)), mode='constant', constant_values=0)
+        out = np.zeros((n, d, d), dtype=np.uint32)
+        for k, win in enumerate(_shifted_3x3(padded, d)):
+            out += win * template[:, k // 3, k % 3, None, None].astype(np.uint32)
+        return out
+    raise ValueError(f"unknown action {act}")
+
+def run_set_batch(gray, template, sets):
+    """
+    gray     : gray_batch() 的結果，各為 (N, dim, dim) uint32
+    template : (N, 3, 3) uint8
+    sets     : 長度 N，各 pattern 這個 set 的 action list (或 compile_actions 後的 plan)
+    return   : 長度 N 的 list，各 pattern 的結果影像
+
+    每一步把「目前影像大小相同、動作相同」的 pattern 一起算；
+    pooling 後影像變小的 pattern 換到對應大小的群組。
+    """
+    n = len(sets)
+    steps = max(len(a) for a in sets)
+    acts = np.full((n, steps), -1)
+    for i, a in enumerate(sets):
+        acts[i, :len(a)] = a
+
+    # 目前大小 -> (pattern index, 影像)
+    groups = {None: (np.arange(n), None)}
+    results = [None] * n
+    for t in range(steps):
+        nxt = {}
+        for idx, imgs in groups.values():
+            col = acts[idx, t]
+            for act in np.unique(col):
+                sel = col == act
+                sub_idx = idx[sel]
+                sub = None if imgs is None else imgs[sel]
+                if act < 0:
+                    for i, img in zip(sub_idx, sub):
+                        results[i] = img
+                    continue
+                sub_gray = [g[sub_idx] for g in gray] if act <= 2 else None
+                sub = apply_action_batch(act, sub, sub_gray, template[sub_idx])
+                key = sub.shape[1]
+                if key in nxt:
+                    nxt[key] = (np.concatenate([nxt[key][0], sub_idx]),
+                                np.concatenate([nxt[key][1], sub]))
+                else:
+                    nxt[key] = (sub_idx, sub)
+        groups = nxt
+
+    for idx, imgs in groups.values():
+        for i, img in zip(idx, imgs):
+            results[i] = img
+    return results
+
+def golden_batch(patterns):
+    """
+    patterns : draw_pattern() 的結果 list
+    return   : 各 pattern 的 golden_data (每個 set 先寫預期輸出的數量，再寫答案)
+    """
+    goldens = [[] for _ in patterns]
+    for size_idx in DIMS:
+        idx = [p for p, pat in enumerate(patterns) if pat[0] == size_idx]
+        if not idx:
+            continue
+        gray = gray_batch(np.stack([patterns[p][1] for p in idx]),
+                          np.stack([patterns[p][2] for p in idx]),
+                          np.stack([patterns[p][3] for p in idx]))
+        template = np.stack([patterns[p][4] for p in idx])
+
+        for set_idx in range(8):
+            plans = [compile_actions(patterns[p][5][set_idx], DIMS[size_idx]) for p in idx]
+            outs = run_set_batch(gray, template, plans)
+            for p, img in zip(idx, outs):
+                flat_result = img.ravel().tolist()
+                goldens[p].append(len(flat_result))
+                goldens[p].extend(flat_result)
+    return goldens
+
+def pattern_inputs(pattern):
+    # R, G, B 交錯排列 (Raster scan)，action 每個 set 先寫數量再寫內容
+    size_idx, R, G, B, template, sets = pattern
+    img_data = [size_idx] + np.stack([R, G, B], axis=-1).ravel().tolist()
+    tpl_data = template.ravel().tolist()
+    act_data = []
+    for actions in sets:
+        act_data.append(len(actions))
         act_data.extend(actions)
-        print(f"Actions: {actions}")
-        
-        # 3. 執行演算法
-        for act in actions:
-            if act == 0:   # Gray Max
-                current_img = np.maximum(np.maximum(R, G), B).astype(np.uint32)
-            elif act == 1: # Gray Avg
-                current_img = ((R.astype(np.uint32) + G + B) // 3)
-            elif act == 2: # Gray Weighted
-                current_img = (R.astype(np.uint32)//4 + G.astype(np.uint32)//2 + B.astype(np.uint32)//4)
-            elif act == 3: # Max Pooling
-                curr_dim = current_img.shape[0]
-                if curr_dim > 4:
-                    # 2x2 stride 2 Max Pooling
-                    current_img = current_img.reshape(curr_dim//2, 2, curr_dim//2, 2).max(axis=(1, 3))
-            elif act == 4: # Negative
-                current_img = 255 - current_img
-            elif act == 5: # Horizontal Flip
-                current_img = np.fliplr(current_img)
-            elif act == 6: # Median Filter (Replication Padding)
-                current_img = median_filter(current_img, size=3, mode='nearest')
-            elif act == 7: # Cross Correlation (Zero Padding)
-                curr_dim = current_img.shape[0]
-                padded_img = np.pad(current_img, pad_width=1, mode='constant', constant_values=0)
-                out_img = np.zeros((curr_dim, curr_dim), dtype=np.uint32)
-                for i in range(curr_dim):
-                    for j in range(curr_dim):
-                        window = padded_img[i:i+3, j:j+3]
-                        out_img[i, j] = np.sum(window * template)
-                current_img = out_img
-                
-        # 顯示該 Set 的結果
-        flat_result = current_img.flatten().tolist()
-        # ★ 關鍵修正：先寫入預期輸出的數量，再寫入答案
-        golden_data.append(len(flat_result)) 
-        golden_data.extend(flat_result)
-        
-    return img_data, tpl_data, act_data, golden_data
+    return img_data, tpl_data, act_data
+
+# ==========================================
+# Coverage model
+# ==========================================
+# bin 種類 (d 皆為影像邊長)：
+#   ("dim", d)            原始影像大小
+#   ("first", d, a)       set 的第一個 action (gray) 與原始大小
+#   ("size", a, d)        action 3 ~ 7 執行時的影像大小 (例如 pooling 做到 4x4)
+#   ("bigram", a, b, d)   相鄰兩個 action，d 為 b 執行時的影像大小
+#                         (例如 16x16 上 pooling 後緊接 median 是 ("bigram", 3, 6, 8))
+# 全部 bin = 所有合法 action list 能碰到的 bin，不會有打不到的 bin。
+MID_ACTIONS = (3, 4, 5, 6)
+MAX_MID = 6
+COVER_KINDS = ("dim", "first", "size", "bigram")
+
+def set_bins(dim, actions):
+    bins = {("first", dim, actions[0])}
+    d = dim
+    for prev, act in zip(actions, actions[1:]):
+        bins.add(("size", act, d))
+        bins.add(("bigram", prev, act, d))
+        if act == 3 and d > 4:
+            d //= 2
+    return bins
+
+def pattern_bins(pattern):
+    dim = DIMS[pattern[0]]
+    bins = {("dim", dim)}
+    for actions in pattern[5]:
+        bins |= set_bins(dim, actions)
+    return bins
+
+_CANDIDATES = {}
+
+def candidate_sets(dim):
+    """所有合法的 action list ([gray] + 0 ~ 6 個 mid + [7]) 與各自覆蓋的 bin"""
+    if dim not in _CANDIDATES:
+        cands = []
+        for first in range(3):
+            for k in range(MAX_MID + 1):
+                for mid in itertools.product(MID_ACTIONS, repeat=k):
+                    actions = [first, *mid, 7]
+                    cands.append((actions, frozenset(set_bins(dim, actions))))
+        _CANDIDATES[dim] = cands
+    return _CANDIDATES[dim]
+
+def coverage_universe():
+    universe = set()
+    for dim in DIMS.values():
+        universe.add(("dim", dim))
+        for _, bins in candidate_sets(dim):
+            universe |= bins
+    return universe
+
+def cover_patterns(seed=SEED):
+    """
+    Greedy 產生能打滿全部 bin 的最少 pattern。
+    每個 pattern 對三種 dim 各試一次：8 個 set 依序挑「新增 bin 最多、action 最少」的 action list，
+    取新增最多的 dim；已打滿後剩下的 set 自然會挑最短的 [gray, 7]。
+    影像內容仍由 pattern_rng(seed, pat_idx) 抽。
+    """
+    universe = coverage_universe()
+    covered = set()
+    patterns = []
+    while covered != universe:
+        best = None
+        for size_idx, dim in DIMS.items():
+            new = covered | {("dim", dim)}
+            sets = []
+            for _ in range(8):
+                actions, bins = max(candidate_sets(dim), key=lambda c: (len(c[1] - new), -len(c[0])))
+                sets.append(actions)
+                new |= bins
+            if best is None or len(new) > len(best[0]):
+                best = (new, size_idx, sets)
+        covered, size_idx, sets = best
+
+        rng = pattern_rng(seed, len(patterns))
+        patterns.append((size_idx, *draw_images(rng, DIMS[size_idx]), sets))
+    return patterns
+
+def coverage_report(covered, num_patterns):
+    universe = coverage_universe()
+    lines = [f"Patterns : {num_patterns}",
+             f"Coverage : {len(covered & universe)} / {len(universe)} bins"]
+    for kind in COVER_KINDS:
+        total = sorted(b for b in universe if b[0] == kind)
+        hit = sum(b in covered for b in total)
+        lines.append(f"  {kind:7s}: {hit:4d} / {len(total):4d} ({100 * hit / len(total):6.2f}%)")
+    missing = sorted(universe - covered)
+    if missing:
+        lines.append("Missing bins:")
+        lines += [f"  {b}" for b in missing]
+    return "\n".join(lines) + "\n"
+
+CHUNK_PATTERNS = 256  # 每批抽 / 算的 pattern 數，記憶體只跟這個有關 (也是分給 worker 的單位)
+IN_FLIGHT = 4         # jobs > 1 時每個 worker 最多排隊幾批
+OUT_DIR = "../00_TESTBED"
+OUT_FILES = ("img.dat", "template.dat", "action.dat", "golden.dat")
+
+def _lines(values):
+    return "".join(f"{val}\n" for val in values)
+
+def render_chunk(job):
+    """
+    job    : (seed, 這批的 pattern 編號, verbose)
+    return : render_patterns() 的結果 (四個檔案為 img / template / action / golden)
+    """
+    seed, pat_ids, verbose = job
+    return render_patterns(pat_ids, [draw_pattern(p, seed) for p in pat_ids], verbose)
+
+def render_patterns(pat_ids, patterns, verbose=False):
+    """return : (log 文字, 四個檔案的內容, 這些 pattern 打到的 coverage bin)"""
+    goldens = golden_batch(patterns)
+
+    log = "".join(describe_pattern(p, pat) for p, pat in zip(pat_ids, patterns)) if verbose else ""
+    texts = [[] for _ in OUT_FILES]
+    for pattern, gld in zip(patterns, goldens):
+        for buf, values in zip(texts, pattern_inputs(pattern) + (gld,)):
+            buf.append(_lines(values))
+    bins = set().union(*map(pattern_bins, patterns))
+    return log, ["".join(buf) for buf in texts], bins
+
+def generate_chunks(pat_ids, seed=SEED, jobs=1, verbose=False, chunk=CHUNK_PATTERNS):
+    """
+    依 pat_ids 順序逐批 yield render_chunk() 的結果。
+    jobs > 1 時由 process pool 平行產生，依送出順序取回，輸出與 jobs 無關。
+    pat_ids 可以是 range；工作清單是 generator，同時在 pool 裡的最多 IN_FLIGHT * jobs 批，
+    寫檔跟不上時也不會一直堆積，記憶體與 pattern 數無關。
+    """
+    work = ((seed, pat_ids[s:s + chunk], verbose) for s in range(0, len(pat_ids), chunk))
+    if jobs <= 1:
+        yield from map(render_chunk, work)
+        return
+    with Pool(jobs) as pool:
+        pending = deque()
+        for job in work:
+            pending.append(pool.apply_async(render_chunk, (job,)))
+            if len(pending) >= IN_FLIGHT * jobs:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
 
 def main():
-    num_patterns = 200
-    
-    all_imgs, all_tpls, all_acts, all_goldens = [], [], [], []
-    
-    for p in range(num_patterns):
-        img, tpl, act, gld = generate_pattern(p)
-        all_imgs.extend(img)
-        all_tpls.extend(tpl)
-        all_acts.extend(act)
-        all_goldens.extend(gld)
-        
+    parser = argparse.ArgumentParser(description="Lab05 TMIP pattern generator")
+    parser.add_argument("--pat-num", type=int, default=200, help="pattern 數量")
+    parser.add_argument("--seed", type=int, default=SEED, help="master seed")
+    parser.add_argument("--jobs", type=int, default=1, help="平行產生的 process 數")
+    parser.add_argument("--patterns", type=int, nargs="+", metavar="PAT",
+                        help="只輸出指定編號的 pattern (debug 用，內容與完整產生時相同)")
+    parser.add_argument("--cover", action="store_true",
+                        help="改為 greedy 產生打滿 coverage 的最少 pattern (忽略 --pat-num / --patterns)")
+    parser.add_argument("--verbose", action="store_true", help="印出每個 set 的 action")
+    args = parser.parse_args()
+
+    if args.cover:
+        patterns = cover_patterns(args.seed)
+        pat_ids = list(range(len(patterns)))
+        chunks = [render_patterns(pat_ids, patterns, args.verbose)]
+    else:
+        pat_ids = args.patterns if args.patterns else range(args.pat_num)
+        chunks = generate_chunks(pat_ids, args.seed, args.jobs, args.verbose)
+
     # 確保資料夾存在 (對應 Verilog 的相對路徑)
-    os.makedirs("../00_TESTBED", exist_ok=True)
-        
-    # 分別輸出給 Verilog $fscanf 讀取的檔案
-    with open("../00_TESTBED/img.dat", "w") as f:
-        for val in all_imgs: f.write(f"{val}\n")
-            
-    with open("../00_TESTBED/template.dat", "w") as f:
-        for val in all_tpls: f.write(f"{val}\n")
-            
-    with open("../00_TESTBED/action.dat", "w") as f:
-        for val in all_acts: f.write(f"{val}\n")
-            
-    with open("../00_TESTBED/golden.dat", "w") as f:
-        for val in all_goldens: f.write(f"{val}\n")
-            
-    print(f"\n[Success] Generated {num_patterns} patterns.")
-    print("Files 'img.dat', 'template.dat', 'action.dat', and 'golden.dat' are ready!")
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    # 分別輸出給 Verilog $fscanf 讀取的檔案，每批算完就寫出去
+    covered = set()
+    files = [open(os.path.join(OUT_DIR, name), "w", buffering=1 << 20) for name in OUT_FILES]
+    try:
+        for log, texts, bins in chunks:
+            if log:
+                print(log, end="")
+            for f, text in zip(files, texts):
+                f.write(text)
+            covered |= bins
+    finally:
+        for f in files:
+            f.close()
+
+    report = coverage_report(covered, len(pat_ids))
+    with open(os.path.join(OUT_DIR, "coverage.txt"), "w") as f:
+        f.write(report)
+    print("\n" + report.split("Missing bins:")[0], end="")
+
+    print(f"\n[Success] Generated {len(pat_ids)} patterns (seed = {args.seed}).")
+    print("Files 'img.dat', 'template.dat', 'action.dat', 'golden.dat' and 'coverage.txt' are ready!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from huffman_golden import MODE_IDS, MODE_WORDS, NUM_LEAVES, RULES, encode_ids_batch
+from huffman_table import WEIGHT_MAX, WEIGHT_MIN, lookup_codebook, table_weights
+
+# ==================================================
+# Lab06 tie-break 差異掃描
+#
+# 三支 script 的 tie-break preset 對 7^8 種 weight 逐一比較 ILOVE / ICLAB 的輸出，
+# 依「哪幾個 preset 輸出相同」以及「字串中哪幾個字元的編碼不同」分成等價類，
+# 每一類留第一個 (index 最小) 的 weight 當代表，寫成只含這些代表的 input.txt。
+# 全空間切成固定大小的 chunk 丟給 process pool 平行算。
+# ==================================================
+CHUNK = 1 << 16
+TOTAL = (WEIGHT_MAX - WEIGHT_MIN + 1) ** NUM_LEAVES
+
+
+def _partition(outputs, names):
+    """每列各 preset 的輸出 -> 分組字串，例如 "generate=huffmancode|random" (全部相同時為 None)"""
+    groups = []
+    for name, out in zip(names, outputs):
+        for g in groups:
+            if g[1] == out:
+                g[0].append(name)
+                break
+        else:
+            groups.append(([name], out))
+    if len(groups) == 1:
+        return None
+    return "|".join("=".join(g[0]) for g in groups)
+
+
+def scan_chunk(job):
+    """
+    job    : (起始 index, 結束 index, preset 名稱)
+    return : (這個 chunk 的 vector 數, {(mode, 分組, 不同字元的 mask): [數量, 最小 index]})
+    """
+    start, stop, names = job
+    idx = np.arange(start, stop)
+    weights = table_weights(idx)
+    books = [lookup_codebook(weights, name) for name in names]
+
+    classes = {}
+    for mode, ids in MODE_IDS.items():
+        streams = [encode_ids_batch(codes, lengths, ids) for codes, lengths in books]
+        bits = np.stack([b for b, _ in streams], axis=1)
+        nbits = np.stack([n for _, n in streams], axis=1)
+        differ = ((bits != bits[:, :1]) | (nbits != nbits[:, :1])).any(axis=1)
+        rows = np.flatnonzero(differ)
+        if not len(rows):
+            continue
+
+        # 字串中第 k 個字元在任兩個 preset 間編碼不同 -> mask 第 k bit
+        char_mask = np.zeros(len(rows), dtype=np.int64)
+        for k, c in enumerate(ids):
+            code = np.stack([cb[0][rows, c] for cb in books], axis=1)
+            length = np.stack([cb[1][rows, c] for cb in books], axis=1)
+            diff_k = ((code != code[:, :1]) | (length != length[:, :1])).any(axis=1)
+            char_mask |= diff_k.astype(np.int64) << k
+
+        # 以 (bits, nbits) 分組 -> 每列一個 partition 字串；同 partition 的列一起統計
+        sig = np.concatenate([bits.astype(np.int64)[rows], nbits[rows]], axis=1)
+        eq = (sig[:, :, None] == sig[:, None, :]).reshape(len(rows), -1)
+        key_rows = np.concatenate([eq, char_mask[:, None]], axis=1)
+        uniq, first, count = np.unique(key_rows, axis=0, return_index=True, return_counts=True)
+        for u, f, n in zip(uniq, first, count):
+            r = rows[f]
+            outs = [(int(bits[r, j]), int(nbits[r, j])) for j in range(len(names))]
+            key = (mode, _partition(outs, names), int(u[-1]))
+            if key in classes:
+                classes[key][0] += int(n)
+                classes[key][1] = min(classes[key][1], int(idx[r]))
+            else:
+                classes[key] = [int(n), int(idx[r])]
+    return stop - start, classes
+
+
+def scan(names=tuple(RULES), jobs=None, chunk=CHUNK, total=TOTAL):
+    """掃過 [0, total) 的所有 weight，回傳 {class key: [數量, 代表 index]}"""
+    work = [(s, min(s + chunk, total), tuple(names)) for s in range(0, total, chunk)]
+    jobs = jobs or os.cpu_count()
+    classes = {}
+    done = 0
+    t0 = time.time()
+    with Pool(jobs) as pool:
+        for n, part in pool.imap_unordered(scan_chunk, work):
+            for key, (count, first) in part.items():
+                if key in classes:
+                    classes[key][0] += count
+                    classes[key][1] = min(classes[key][1], first)
+                else:
+                    classes[key] = [count, first]
+            done += n
+            dt = time.time() - t0
+            rate = done / dt if dt else 0.0
+            eta = (total - done) / rate if rate else 0.0
+            print(f"\r{done:,} / {total:,} ({100 * done / total:5.1f}%)  "
+                  f"{rate / 1e3:8.1f} k vec/s  ETA {eta:6.1f} s  classes {len(classes)}",
+                  end="", flush=True)
+    print()
+    return classes
+
+
+def _mask_chars(mode, mask):
+    word = MODE_WORDS[mode]
+    return "".join(c if mask >> k & 1 else "." for k, c in enumerate(word))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab06 tie-break differential checker")
+    parser.add_argument("--rules", nargs="+", default=list(RULES), choices=list(RULES), help="要互相比較的 preset")
+    parser.add_argument("--jobs", type=int, default=None, help="process 數 (預設為 CPU 數)")
+    parser.add_argument("--out", default="input.txt", help="代表 pattern 的輸出檔")
+    parser.add_argument("--limit", type=int, default=TOTAL, help="只掃前 N 個 weight (測試用)")
+    args = parser.parse_args()
+    if not 0 <= args.limit <= TOTAL:
+        parser.error(f"--limit 需介於 0 與 {TOTAL:,} 之間")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs 至少要 1")
+
+    t0 = time.time()
+    classes = scan(args.rules, args.jobs, total=args.limit)
+    dt = time.time() - t0
+
+    print(f"\n掃描 {args.limit:,} 種 weight x {len(MODE_IDS)} 個 mode，耗時 {dt:.1f} s")
+    if not classes:
+        print("所有 preset 的輸出都相同")
+        return
+
+    print(f"共 {len(classes)} 個輸出不同的等價類：")
+    print(f"{'mode':4s}  {'chars':5s}  {'count':>9s}  {'weights':15s}  groups")
+    lines = []
+    for (mode, part, mask), (count, first) in sorted(classes.items(), key=lambda kv: (kv[0][0], -kv[1][0])):
+        w = table_weights([first])[0].tolist()
+        print(f"{MODE_WORDS[mode]:4s}  {_mask_chars(mode, mask):5s}  {count:9,d}  {' '.join(map(str, w)):15s}  {part}")
+        lines.append(" ".join(map(str, w)) + f" {mode}\n")
+
+    with open(args.out, "w") as f:
+        f.writelines(lines)
+    print(f"\n{len(lines)} 個代表 pattern 已寫入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+from bisect import insort
+from functools import lru_cache
+
+import numpy as np
+
+# ==================================================
+# Lab06 Huffman 黃金模型 (三支 script 共用)
+#
+# Node 編號固定：0 ~ 7 為 leaf (依 CHARS 順序)，8 ~ 14 為第 k 次合併產生的 internal node，
+# root 一定是 14。整棵樹只用 parent / bit 兩個長度 15 的陣列表示，
+# 每個字元的編碼為整數 (code, length)，code 的最高位為 root 端的 bit。
+# ==================================================
+CHARS = ['A', 'B', 'C', 'E', 'I', 'L', 'O', 'V']
+NUM_LEAVES = 8
+NUM_NODES = 2 * NUM_LEAVES - 1
+ROOT = NUM_NODES - 1
+
+MODE_WORDS = {0: "ILOVE", 1: "ICLAB"}
+MODE_IDS = {mode: [CHARS.index(c) for c in word] for mode, word in MODE_WORDS.items()}
+
+
+# ==================================================
+# Tie-break 規則 (每支 script 的行為為一個 preset)
+# ==================================================
+# tie        : 每個 node 在「權重相同」時的排名，小的先被取出
+# equal_left : True  -> 取出的兩個 node 權重相同時，先取出的放左邊 (0)
+#              False -> 一律先取出的放右邊 (1)
+# queue      : "sorted" 每次取 (weight, tie) 最小的兩個
+#              "heap"   依 heapq 的 push / pop 過程取，(weight, tie) 相同時
+#                       由 node 在 heap 中的位置決定 (與 heapq 完全相同)
+RULES = {
+    # huffman generate.py：char priority，leaf 先於 subtree，subtree 之間交給 heapq
+    "generate":    dict(tie=tuple(range(NUM_LEAVES)) + (NUM_LEAVES,) * (NUM_LEAVES - 1),
+                        equal_left=True, queue="heap"),
+    # huffmancode.py：leaf 先於 subtree，leaf 依 char 順序，subtree 舊的先
+    "huffmancode": dict(tie=tuple(range(NUM_NODES)), equal_left=False, queue="sorted"),
+    # import random.py：(weight 大 -> 小, id 小 -> 大) 排序後從尾端取，即 id 大的先
+    "random":      dict(tie=tuple(range(NUM_NODES - 1, -1, -1)), equal_left=False, queue="sorted"),
+}
+
+
+def _rule(rule):
+    return RULES[rule] if isinstance(rule, str) else rule
+
+
+# ==================================================
+# heapq 的 sift (演算法與 CPython heapq 相同，比較只用 key)
+# ==================================================
+def _sift_down(heap, key, start, pos):
+    item = heap[pos]
+    while pos > start:
+        parent = (pos - 1) >> 1
+        if key[item] < key[heap[parent]]:
+            heap[pos] = heap[parent]
+            pos = parent
+            continue
+        break
+    heap[pos] = item
+
+
+def _heap_pop(heap, key):
+    last = heap.pop()
+    if not heap:
+        return last
+    top = heap[0]
+    heap[0] = last
+    # _siftup：一路換到較小的 child 直到 leaf，再往上 sift
+    end = len(heap)
+    pos = 0
+    child = 1
+    while child < end:
+        if child + 1 < end and not key[heap[child]] < key[heap[child + 1]]:
+            child += 1
+        heap[pos] = heap[child]
+        pos = child
+        child = 2 * pos + 1
+    heap[pos] = last
+    _sift_down(heap, key, 0, pos)
+    return top
+
+
+def _link(parent, bit, node, a, b, equal_left, wa, wb):
+    # 先取出的 a 放右邊 (1)、b 放左邊 (0)；equal_left 且同權重時相反
+    if equal_left and wa == wb:
+        a, b = b, a
+    parent[a] = parent[b] = node
+    bit[a] = 1
+
+
+def _build_heap(weights, tie, equal_left):
+    weight = list(weights)
+    key = [weight[i] << 4 | tie[i] for i in range(NUM_LEAVES)]
+    parent = [0] * NUM_NODES
+    bit = [0] * NUM_NODES
+    heap = []
+    for i in range(NUM_LEAVES):
+        heap.append(i)
+        _sift_down(heap, key, 0, i)
+    for node in range(NUM_LEAVES, NUM_NODES):
+        a = _heap_pop(heap, key)
+        b = _heap_pop(heap, key)
+        _link(parent, bit, node, a, b, equal_left, weight[a], weight[b])
+        weight.append(weight[a] + weight[b])
+        key.append(weight[node] << 4 | tie[node])
+        heap.append(node)
+        _sift_down(heap, key, 0, len(heap) - 1)
+    return parent, bit
+
+
+def _build_sorted(weights, tie, equal_left):
+    # (weight, tie, node) 壓成一個整數，佇列維持排序，每次取最前面兩個
+    queue = sorted([weights[i] << 8 | tie[i] << 4 | i for i in range(NUM_LEAVES)])
+    parent = [0] * NUM_NODES
+    bit = [0] * NUM_NODES
+    for node in range(NUM_LEAVES, NUM_NODES):
+        ka = queue.pop(0)
+        kb = queue.pop(0)
+        wa, wb = ka >> 8, kb >> 8
+        _link(parent, bit, node, ka & 15, kb & 15, equal_left, wa, wb)
+        insort(queue, (wa + wb) << 8 | tie[node] << 4 | node)
+    return parent, bit
+
+
+# ==================================================
+# Huffman build
+# ==================================================
+def build_tree(weights, rule="huffmancode"):
+    """
+    weights : 8 個權重 (CHARS 順序)
+    return  : parent, bit (各長度 15)，bit 為該 node 在 parent 下的位置 (0 左 1 右)
+    """
+    rule = _rule(rule)
+    build = _build_heap if rule["queue"] == "heap" else _build_sorted
+    return build(weights, rule["tie"], rule["equal_left"])
+
+
+def tree_codes(parent, bit):
+    """由 parent / bit 陣列算每個 leaf 的 (code, length)；parent 編號一定比 child 大，由 root 往下推"""
+    code = [0] * NUM_NODES
+    length = [0] * NUM_NODES
+    for node in range(ROOT - 1, -1, -1):
+        p = parent[node]
+        code[node] = code[p] << 1 | bit[node]
+        length[node] = length[p] + 1
+    return tuple(code[:NUM_LEAVES]), tuple(length[:NUM_LEAVES])
+
+
+@lru_cache(maxsize=1 << 16)
+def _codebook(weights, rule):
+    return tree_codes(*build_tree(weights, rule))
+
+
+def codebook(weights, rule="huffmancode"):
+    """return : codes, lengths (各 8 個整數，CHARS 順序)"""
+    if isinstance(rule, str):
+        return _codebook(tuple(weights), rule)
+    return tree_codes(*build_tree(weights, rule))
+
+
+# ==================================================
+# 輸出
+# ==================================================
+def code_str(code, length):
+    return format(code, f"0{length}b")
+
+
+def code_table(weights, rule="huffmancode"):
+    """return : {char: "0101..."}"""
+    codes, lengths = codebook(weights, rule)
+    return {c: code_str(codes[i], lengths[i]) for i, c in enumerate(CHARS)}
+
+
+def encode_ids(codes, lengths, ids):
+    """依序串接 ids 的編碼 -> (bits, 總長度)"""
+    bits = total = 0
+    for i in ids:
+        bits = bits << lengths[i] | codes[i]
+        total += lengths[i]
+    return bits, total
+
+
+def mode_bitstream(weights, mode, rule="huffmancode"):
+    """mode 0 / 1 的 ILOVE / ICLAB 編碼字串 (golden.txt 的一行)"""
+    codes, lengths = codebook(weights, rule)
+    return code_str(*encode_ids(codes, lengths, MODE_IDS[mode]))
+
+
+# ==================================================
+# Batch 版本：(N, 8) 權重矩陣一次建 N 棵樹
+#
+# 字母固定 8 個、合併固定 7 次，每一步都是對 N 列同時做的固定 shape 運算：
+# 取 tie-break key 最小的兩個 node -> 合併 -> 記錄 parent / bit。
+# "heap" preset 同樣把 heapq 的 sift 逐步向量化 (每列的 heap 位置各自追蹤)。
+# ==================================================
+CHUNK = 8192          # batch 每次處理的列數 (陣列留在 cache 內)
+_BIG = np.int64(1) << 40
+# key = weight << 8 | ...，合併後的權重要小於 2^32 才不會撞到 _BIG；
+# 超過的列改走 Python int 的 scalar 版本 (與原本的 script 一樣沒有上限)
+MAX_BATCH_SUM = 1 << 32
+
+
+def _scalar_rows(weights):
+    """權重總和 >= MAX_BATCH_SUM 的列 (用 float64 加總，避免 int64 溢位)"""
+    return np.flatnonzero(weights.sum(axis=1, dtype=np.float64) >= MAX_BATCH_SUM)
+
+
+def _as_weight_matrix(weights):
+    try:
+        return np.asarray(weights, dtype=np.int64).reshape(-1, NUM_LEAVES)
+    except OverflowError:
+        raise ValueError("權重超出 int64 範圍，請改用 codebook() / build_tree() 逐筆計算") from None
+
+
+# heap 版本：每列的 heap 攤平成一維，元素為 key << 4 | node，比較只看 key (>> 4)
+def _sift_down_batch(heap, base, pos):
+    item = heap[base + pos]
+    moving = np.ones(len(base), dtype=bool)
+    for _ in range(3):   # heap 最多 8 個 -> 最多 3 層
+        parent = np.maximum(pos - 1, 0) >> 1
+        up = heap[base + parent]
+        moving &= (pos > 0) & ((item >> 4) < (up >> 4))
+        idx = base + pos
+        heap[idx] = np.where(moving, up, heap[idx])
+        pos = np.where(moving, parent, pos)
+    heap[base + pos] = item
+
+
+def _heap_pop_batch(heap, base, size):
+    # size : pop 之前的 heap 大小 (所有列相同)，回傳被 pop 的 node
+    last = heap[base + size - 1]
+    end = size - 1
+    if end == 0:
+        return last & 15
+    top = heap[base]
+    heap[base] = last
+    pos = np.zeros(len(base), dtype=np.int64)
+    for _ in range(3):
+        child = 2 * pos + 1
+        active = child < end
+        if not active.any():
+            break
+        c0 = np.minimum(child, end - 1)
+        c1 = np.minimum(child + 1, end - 1)
+        v0, v1 = heap[base + c0], heap[base + c1]
+        right = (child + 1 < end) & ~((v0 >> 4) < (v1 >> 4))
+        idx = base + pos
+        heap[idx] = np.where(active, np.where(right, v1, v0), heap[idx])
+        pos = np.where(active, np.where(right, c1, c0), pos)
+    heap[base + pos] = last
+    _sift_down_batch(heap, base, pos)
+    return top & 15
+
+
+def _build_tree_chunk(weights, rule):
+    tie = np.asarray(rule["tie"], dtype=np.int64)
+    heap_mode = rule["queue"] == "heap"
+    n = len(weights)
+    r = np.arange(n)
+
+    weight = np.zeros((n, NUM_NODES), dtype=np.int64)
+    weight[:, :NUM_LEAVES] = weights
+    parent = np.zeros((n, NUM_NODES), dtype=np.int64)
+    bit = np.zeros((n, NUM_NODES), dtype=np.int64)
+
+    if heap_mode:
+        # 與 _build_heap 相同：key = (weight, tie)，相同時看 heap 位置
+        heap = np.zeros(n * NUM_LEAVES, dtype=np.int64)
+        base = r * NUM_LEAVES
+        for i in range(NUM_LEAVES):
+            heap[base + i] = (weights[:, i] << 4 | tie[i]) << 4 | i
+            _sift_down_batch(heap, base, np.full(n, i))
+        size = NUM_LEAVES
+    else:
+        # 與 _build_sorted 相同：key 兩兩不同，直接取最小的兩個；已合併的 node 設成 _BIG
+        key = np.full((n, NUM_NODES), _BIG)
+        key[:, :NUM_LEAVES] = weights << 8 | tie[:NUM_LEAVES] << 4 | np.arange(NUM_LEAVES)
+
+    for node in range(NUM_LEAVES, NUM_NODES):
+        if heap_mode:
+            a = _heap_pop_batch(heap, base, size)
+            b = _heap_pop_batch(heap, base, size - 1)
+        else:
+            a = key.argmin(axis=1)
+            key[r, a] = _BIG
+            b = key.argmin(axis=1)
+            key[r, b] = _BIG
+
+        wa, wb = weight[r, a], weight[r, b]
+        if rule["equal_left"]:
+            swap = wa == wb
+            a, b = np.where(swap, b, a), np.where(swap, a, b)
+        parent[r, a] = parent[r, b] = node
+        bit[r, a] = 1
+        weight[:, node] = wa + wb
+
+        if heap_mode:
+            size -= 1
+            heap[base + size - 1] = (weight[:, node] << 4 | tie[node]) << 4 | node
+            _sift_down_batch(heap, base, np.full(n, size - 1))
+        else:
+            key[:, node] = weight[:, node] << 8 | tie[node] << 4 | node
+
+    return parent, bit
+
+
+def build_tree_batch(weights, rule="huffmancode", chunk=CHUNK):
+    """
+    weights : (N, 8) 權重
+    return  : parent, bit (各 (N, 15))
+    """
+    rule = _rule(rule)
+    weights = _as_weight_matrix(weights)
+    parent = np.zeros((len(weights), NUM_NODES), dtype=np.int64)
+    bit = np.zeros((len(weights), NUM_NODES), dtype=np.int64)
+    for s in range(0, len(weights), chunk):
+        parent[s:s + chunk], bit[s:s + chunk] = _build_tree_chunk(weights[s:s + chunk], rule)
+    for i in _scalar_rows(weights).tolist():
+        parent[i], bit[i] = build_tree(weights[i].tolist(), rule)
+    return parent, bit
+
+
+def tree_codes_batch(parent, bit):
+    """return : codes (N, 8) uint32、lengths (N, 8) uint8"""
+    r = np.arange(len(parent))
+    code = np.zeros(parent.shape, dtype=np.uint32)
+    length = np.zeros(parent.shape, dtype=np.uint8)
+    for node in range(ROOT - 1, -1, -1):
+        p = parent[:, node]
+        code[:, node] = code[r, p] << np.uint32(1) | bit[:, node].astype(np.uint32)
+        length[:, node] = length[r, p] + 1
+    return code[:, :NUM_LEAVES], length[:, :NUM_LEAVES]
+
+
+def codebook_batch(weights, rule="huffmancode", chunk=CHUNK):
+    """(N, 8) 權重 -> codes (N, 8) uint32、lengths (N, 8) uint8"""
+    rule = _rule(rule)
+    weights = _as_weight_matrix(weights)
+    codes = np.zeros(weights.shape, dtype=np.uint32)
+    lengths = np.zeros(weights.shape, dtype=np.uint8)
+    for s in range(0, len(weights), chunk):
+        codes[s:s + chunk], lengths[s:s + chunk] = tree_codes_batch(*_build_tree_chunk(weights[s:s + chunk], rule))
+    for i in _scalar_rows(weights).tolist():
+        codes[i], lengths[i] = codebook(weights[i].tolist(), rule)
+    return codes, lengths
+
+
+def encode_ids_batch(codes, lengths, ids):
+    """
+    每列依序串接 ids 的編碼
+    ids    : 長度 k 的序列，或 (N, k) 每列各自的字元
+    return : bits (N,) uint64 (最後一個字元在最低位)、nbits (N,)
+    """
+    r = np.arange(len(codes))
+    ids = np.broadcast_to(np.asarray(ids, dtype=np.int64), (len(codes), np.shape(ids)[-1]))
+    bits = np.zeros(len(codes), dtype=np.uint64)
+    nbits = np.zeros(len(codes), dtype=np.int64)
+    for k in range(ids.shape[1]):
+        l = lengths[r, ids[:, k]]
+        bits = bits << l.astype(np.uint64) | codes[r, ids[:, k]].astype(np.uint64)
+        nbits += l
+    return bits, nbits
+
+
+def mode_bitstream_batch(codes, lengths, modes):
+    """各列依 mode 0 / 1 編碼 ILOVE / ICLAB -> bits (N,)、nbits (N,)"""
+    ids = np.asarray([MODE_IDS[m] for m in sorted(MODE_IDS)])[np.asarray(modes, dtype=np.int64)]
+    return encode_ids_batch(codes, lengths, ids)
+
+
+def bitstream_lines(bits, nbits):
+    """packed bitstream -> 每列一行 "0101...\n" 的字串 (golden.txt 格式)"""
+    nbits = np.asarray(nbits, dtype=np.int64)
+    width = int(nbits.max()) if len(nbits) else 0
+    j = np.arange(width)
+    shift = np.maximum(nbits[:, None] - 1 - j, 0).astype(np.uint64)
+    chars = np.empty((len(nbits), width + 1), dtype=np.uint8)
+    chars[:, :width] = ((bits[:, None] >> shift) & np.uint64(1)).astype(np.uint8) + ord("0")
+    chars[:, width] = ord("\n")
+    mask = np.ones(chars.shape, dtype=bool)
+    mask[:, :width] = j < nbits[:, None]
+    return np.compress(mask.ravel(), chars.ravel()).tobytes().decode("ascii")
+
+
+# ==================================================
+# 任意訊息：查表 bulk encode / multi-bit LUT decode
+# ==================================================
+def byte_table(codes, lengths):
+    """byte 值 -> (code, length)；不在 CHARS 裡的 byte 長度為 0"""
+    code_of = np.zeros(256, dtype=np.uint32)
+    len_of = np.zeros(256, dtype=np.int64)
+    for i, c in enumerate(CHARS):
+        code_of[ord(c)] = codes[i]
+        len_of[ord(c)] = lengths[i]
+    return code_of, len_of
+
+
+def encode_bytes(message, codes, lengths):
+    """
+    message : bytes (只能有 CHARS 裡的字元)
+    return  : packed (uint8 array，MSB first，最後一個 byte 不足補 0)、總 bit 數
+    """
+    code_of, len_of = byte_table(codes, lengths)
+    msg = np.frombuffer(bytes(message), dtype=np.uint8)
+    c = code_of[msg]
+    l = len_of[msg].astype(np.uint8)
+    if (l == 0).any():
+        bad = bytes(np.unique(msg[l == 0])).decode("latin-1")
+        raise ValueError(f"無法編碼的字元: {bad!r}")
+
+    # 每個字元展開成 max_len 個 bit，只留前 length 個 (分段做，中間陣列留在 cache 內)
+    width = int(l.max()) if len(l) else 0
+    j = np.arange(width)
+    bits = np.empty(int(l.sum()), dtype=np.uint8)
+    pos = 0
+    for s in range(0, len(msg), CHUNK):
+        cs, ls = c[s:s + CHUNK], l[s:s + CHUNK]
+        shift = np.maximum(ls[:, None] - 1 - j, 0).astype(np.uint32)
+        part = ((cs[:, None] >> shift) & 1).astype(np.uint8)[j < ls[:, None]]
+        bits[pos:pos + len(part)] = part
+        pos += len(part)
+    return np.packbits(bits), len(bits)
+
+
+MAX_LUT_BITS = 20     # 2^20 格的表約 100 MB；最長 code 只有 7 bit，預設 16 就夠快
+
+
+class LutDecoder:
+    """
+    每次看 lut_bits 個 bit，查表一次解出其中所有完整的 codeword。
+    表的每一格：解出的字元 (bytes) 與用掉的 bit 數。
+    """
+
+    def __init__(self, codes, lengths, lut_bits=16):
+        self.lut_bits = k = lut_bits
+        self.max_len = m = int(max(lengths))
+        if not m <= k <= MAX_LUT_BITS:
+            raise ValueError(f"lut_bits ({k}) 需介於最長的 code ({m}) 與 {MAX_LUT_BITS} 之間")
+
+        # 單一字元表：看 max_len 個 bit -> (字元, 長度)
+        single_sym = np.zeros(1 << m, dtype=np.int64)
+        single_len = np.zeros(1 << m, dtype=np.int64)
+        for i in range(NUM_LEAVES):
+            lo = codes[i] << (m - lengths[i])
+            single_sym[lo:lo + (1 << (m - lengths[i]))] = i
+            single_len[lo:lo + (1 << (m - lengths[i]))] = lengths[i]
+        self.single = list(zip((ord(CHARS[i]) for i in single_sym.tolist()), single_len.tolist()))
+
+        # multi-symbol 表：所有 k-bit 值同時往後解，codeword 還在 k bit 內就收下
+        val = np.arange(1 << k, dtype=np.int64)
+        used = np.zeros(1 << k, dtype=np.int64)
+        syms = np.zeros((1 << k, k), dtype=np.uint8)
+        count = np.zeros(1 << k, dtype=np.int64)
+        sym_chars = np.frombuffer("".join(CHARS).encode("ascii"), dtype=np.uint8)
+        for step in range(k):
+            # 還沒用掉的 bit 補 0 取前 m 個 (補的 0 只會讓 codeword 超出 k，不會被收下)
+            window = (val << used) >> (k - m) & ((1 << m) - 1)
+            l = single_len[window]
+            ok = used + l <= k
+            if not ok.any():
+                break
+            syms[ok, count[ok]] = sym_chars[single_sym[window[ok]]]
+            count += ok
+            used += np.where(ok, l, 0)
+        self.lut = [(syms[v, :count[v]].tobytes(), int(used[v])) for v in range(1 << k)]
+
+    def decode(self, packed, nbits):
+        """encode_bytes 的反運算：packed bit buffer -> bytes"""
+        k, m = self.lut_bits, self.max_len
+        # 每個 byte 位置往後 4 個 byte 的 big-endian 值 (尾端補 0)，取 k bit 只要一次查 list
+        buf = np.concatenate([np.asarray(packed, dtype=np.uint8), np.zeros(4, dtype=np.uint8)]).astype(np.uint64)
+        word = (buf[:-3] << np.uint64(24) | buf[1:-2] << np.uint64(16) | buf[2:-1] << np.uint64(8) | buf[3:]).tolist()
+        mask_k = (1 << k) - 1
+        lut = self.lut
+        out = []
+        pos = 0
+        end = nbits - k
+        # k <= MAX_LUT_BITS -> (pos & 7) + k <= 32，一個 word 一定夠
+        while pos <= end:
+            chunk, used = lut[word[pos >> 3] >> (32 - k - (pos & 7)) & mask_k]
+            out.append(chunk)
+            pos += used
+        # 剩不到 k bit：逐字元解，不能超過 nbits
+        mask_m = (1 << m) - 1
+        single = self.single
+        tail = bytearray()
+        while pos < nbits:
+            sym, l = single[word[pos >> 3] >> (32 - m - (pos & 7)) & mask_m]
+            if pos + l > nbits:
+                raise ValueError("bitstream 結尾不是完整的 codeword")
+            tail.append(sym)
+            pos += l
+        return b"".join(out) + bytes(tail)
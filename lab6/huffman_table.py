@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from huffman_golden import NUM_LEAVES, RULES, codebook_batch
+
+# ==================================================
+# Lab06 Huffman 預先算好的 codebook 表
+#
+# huffman generate.py 的 weight 只有 1 ~ 7，8 個字元共 7^8 = 5,764,801 種組合，
+# 每個 tie-break rule 全部算一次存成定寬 binary 表，之後用 memory-map 直接查。
+#
+# 檔案格式 (little endian)：
+#   header 64 bytes : magic "HUF6TABL"、格式版本 (u4)、weight_min (u4)、weight_max (u4)、
+#                     record 數 (u8)、rule 名稱 (16 bytes)、rule 內容的 sha1 前 16 bytes
+#   record 12 bytes : code  8 x u1 (CHARS 順序)
+#                     length 4 x u1，每個 byte 放兩個字元的長度 (低 4 bit 為偶數字元)
+#   第 i 筆 record 對應 weight 的 7 進位表示 (A 為最高位)
+# rule 的內容 (tie / equal_left / queue) 一改，sha1 就對不上，必須重建。
+# ==================================================
+MAGIC = b"HUF6TABL"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+WEIGHT_MIN = 1
+WEIGHT_MAX = 7
+
+RECORD = np.dtype([("code", "u1", (NUM_LEAVES,)), ("length", "u1", (NUM_LEAVES // 2,))])
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("weight_min", "<u4"), ("weight_max", "<u4"),
+                   ("count", "<u8"), ("rule", "S16"), ("digest", "u1", (16,))])
+
+BUILD_CHUNK = 1 << 16
+
+_OPENED = {}          # (rule, 絕對路徑) -> 開好的 CodebookTable；build_table 重建後清掉
+_FAILED = {}          # (rule, 絕對路徑) -> 開不起來時檔案的 (mtime, size)，檔案有變才重試
+
+
+def rule_digest(rule):
+    r = RULES[rule]
+    text = repr((tuple(r["tie"]), bool(r["equal_left"]), r["queue"]))
+    return hashlib.sha1(text.encode("ascii")).digest()[:16]
+
+
+def table_path(rule, directory=None):
+    directory = os.path.dirname(os.path.abspath(__file__)) if directory is None else directory
+    return os.path.join(directory, f"huffman_table_{rule}_v{FORMAT_VERSION}.bin")
+
+
+def _radix(wmin, wmax):
+    return wmax - wmin + 1
+
+
+def table_index(weights, wmin=WEIGHT_MIN, wmax=WEIGHT_MAX):
+    """(N, 8) 權重 -> record 編號 (N,)"""
+    w = np.asarray(weights, dtype=np.int64).reshape(-1, NUM_LEAVES) - wmin
+    if w.size and (w.min() < 0 or w.max() >= _radix(wmin, wmax)):
+        raise ValueError(f"weight 超出表的範圍 {wmin} ~ {wmax}")
+    place = _radix(wmin, wmax) ** np.arange(NUM_LEAVES - 1, -1, -1, dtype=np.int64)
+    return w @ place
+
+
+def table_weights(index, wmin=WEIGHT_MIN, wmax=WEIGHT_MAX):
+    """table_index 的反函數：record 編號 (N,) -> (N, 8) 權重"""
+    place = _radix(wmin, wmax) ** np.arange(NUM_LEAVES - 1, -1, -1, dtype=np.int64)
+    return np.asarray(index, dtype=np.int64)[:, None] // place % _radix(wmin, wmax) + wmin
+
+
+def pack_records(codes, lengths):
+    rec = np.zeros(len(codes), dtype=RECORD)
+    rec["code"] = codes
+    rec["length"] = lengths[:, 0::2] | lengths[:, 1::2] << 4
+    return rec
+
+
+def unpack_records(rec):
+    codes = rec["code"].astype(np.uint32)
+    lengths = np.empty(codes.shape, dtype=np.uint8)
+    lengths[:, 0::2] = rec["length"] & 0xF
+    lengths[:, 1::2] = rec["length"] >> 4
+    return codes, lengths
+
+
+# ==================================================
+# Build
+# ==================================================
+def build_table(rule, path=None, wmin=WEIGHT_MIN, wmax=WEIGHT_MAX, chunk=BUILD_CHUNK):
+    path = table_path(rule) if path is None else path
+    count = _radix(wmin, wmax) ** NUM_LEAVES
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, FORMAT_VERSION, wmin, wmax, count, rule.encode("ascii"),
+                 np.frombuffer(rule_digest(rule), dtype=np.uint8))
+
+    tmp = path + ".tmp"
+    t0 = time.time()
+    with open(tmp, "wb") as f:
+        f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        for s in range(0, count, chunk):
+            idx = np.arange(s, min(s + chunk, count))
+            codes, lengths = codebook_batch(table_weights(idx, wmin, wmax), rule)
+            f.write(pack_records(codes, lengths).tobytes())
+            print(f"\r[{rule}] {idx[-1] + 1:,} / {count:,}  ({time.time() - t0:.1f} s)", end="", flush=True)
+    os.replace(tmp, path)
+    _OPENED.pop((rule, os.path.abspath(path)), None)
+    print(f"\n[{rule}] saved to {path} ({os.path.getsize(path) / 2 ** 20:.1f} MiB)")
+    return path
+
+
+# ==================================================
+# Load / lookup
+# ==================================================
+class CodebookTable:
+    def __init__(self, rule, path=None):
+        path = table_path(rule) if path is None else path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path}: 不是 Huffman codebook 表")
+        h = header[0]
+        if int(h["version"]) != FORMAT_VERSION:
+            raise ValueError(f"{path}: 格式版本 {int(h['version'])} != {FORMAT_VERSION}，請重建")
+        if h["rule"].decode("ascii") != rule or h["digest"].tobytes() != rule_digest(rule):
+            raise ValueError(f"{path}: 表的 tie-break rule 與目前的 '{rule}' 不同，請重建")
+
+        self.rule = rule
+        self.wmin = int(h["weight_min"])
+        self.wmax = int(h["weight_max"])
+        self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(int(h["count"]),))
+
+    def lookup(self, weights):
+        """(N, 8) 權重 -> codes (N, 8) uint32、lengths (N, 8) uint8 (與 codebook_batch 相同)"""
+        return unpack_records(self.records[table_index(weights, self.wmin, self.wmax)])
+
+
+def open_table(rule, path=None):
+    """
+    表存在且與目前 rule 相符時回傳 CodebookTable，否則回傳 None。
+    開好的表依 (rule, path) 快取，重複呼叫不會再讀 header / 重新 memmap；
+    沒有表 (或表不對) 時只記下檔案狀態，之後別的 process 建好表就會重新開啟。
+    """
+    path = table_path(rule) if path is None else path
+    key = (rule, os.path.abspath(path))
+    table = _OPENED.get(key)
+    if table is not None:
+        return table
+    sig = _file_signature(path)
+    if key in _FAILED and _FAILED[key] == sig:
+        return None
+    table = _open_table(rule, path)
+    if table is None:
+        _FAILED[key] = sig
+    else:
+        _FAILED.pop(key, None)
+        _OPENED[key] = table
+    return table
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _open_table(rule, path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return CodebookTable(rule, path)
+    except ValueError as e:
+        print(f"[WARN] {e}")
+        return None
+
+
+def lookup_codebook(weights, rule):
+    """有表就查表，沒有表 (或 weight 超出範圍) 就直接 batch 算"""
+    table = open_table(rule)
+    if table is not None:
+        w = np.asarray(weights, dtype=np.int64).reshape(-1, NUM_LEAVES)
+        if w.size == 0 or (w.min() >= table.wmin and w.max() <= table.wmax):
+            return table.lookup(w)
+    return codebook_batch(weights, rule)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Lab06 Huffman codebook tables")
+    parser.add_argument("--rule", nargs="+", default=list(RULES), choices=list(RULES), help="要建表的 tie-break rule")
+    parser.add_argument("--dir", default=None, help="輸出資料夾 (預設與本檔相同)")
+    args = parser.parse_args()
+    for rule in args.rule:
+        build_table(rule, table_path(rule, args.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,16 @@
 
 import csv
 
+import huffman_golden
+
+# ------------------------------------------------------------
+# Characters defined in the Lab spec (fixed order)
+# ------------------------------------------------------------
+CHARS = huffman_golden.CHARS
+
+
 # ------------------------------------------------------------
-# Node class for building the Huffman tree
+# Node class for the Huffman tree returned to callers
 # ------------------------------------------------------------
 class Node:
     def __init__(self, weight, is_leaf, symbol=None, left=None, right=None, create_idx=0):
@@ -27,79 +35,28 @@ class Node:
 
 
 # ------------------------------------------------------------
-# Characters defined in the Lab spec (fixed order)
-# ------------------------------------------------------------
-CHARS = ['A','B','C','E','I','L','O','V']
-
-
-# ------------------------------------------------------------
-# Sorting key according to Lab06 rules:
+# Build Huffman codebook from 8 weights
+# Tie-break ("huffmancode" preset in huffman_golden.py):
 # 1. Weight ascending
 # 2. Leaf before subtree
 # 3. If both leaves: by character order A>B>C>E>I>L>O>V
 # 4. If both subtree: older subtree (smaller create_idx) first
-# ------------------------------------------------------------
-def sort_key(node):
-    w = node.weight
-    t = 0 if node.is_leaf else 1  # leaf first
-    if node.is_leaf:
-        char_rank = CHARS.index(node.symbol)
-        return (w, t, char_rank, node.create_idx)
-    else:
-        return (w, t, node.create_idx, 0)
-
-
-# ------------------------------------------------------------
-# Build Huffman tree from 8 weights
+# Left = larger node, right = smaller node
+# Returns (codes, root); the Node tree is rebuilt from the parent / bit
+# arrays (node id == create_idx: leaves 0 ~ 7, merges 8 ~ 14)
 # ------------------------------------------------------------
 def build_huffman_from_weights(weights):
-    nodes = []
-    create_counter = 0
-
-    # Build leaf nodes
-    for sym, w in zip(CHARS, weights):
-        nodes.append(Node(weight=w, is_leaf=True, symbol=sym, create_idx=create_counter))
-        create_counter += 1
-
-    if len(nodes) == 1:
-        return {nodes[0].symbol: "0"}, nodes[0]
-
-    # Iteratively combine
-    while len(nodes) > 1:
-        nodes.sort(key=sort_key)
-        n1 = nodes.pop(0)
-        n2 = nodes.pop(0)
-
-        # Determine left/right: left = larger node, right = smaller node
-        k1 = sort_key(n1)
-        k2 = sort_key(n2)
-
-        if k1 < k2:
-            left, right = n2, n1
-        else:
-            left, right = n1, n2
-
-        merged = Node(weight=n1.weight + n2.weight,
-                      is_leaf=False,
-                      left=left,
-                      right=right,
-                      create_idx=create_counter)
-        create_counter += 1
-        nodes.append(merged)
-
-    root = nodes[0]
-
-    # DFS generate codes
-    codes = {}
-    def dfs(n, prefix):
-        if n.is_leaf:
-            codes[n.symbol] = prefix or "0"
-            return
-        dfs(n.left,  prefix + "0")
-        dfs(n.right, prefix + "1")
-
-    dfs(root, "")
-    return codes, root
+    parent, bit = huffman_golden.build_tree(list(weights), "huffmancode")
+    nodes = [Node(weight=w, is_leaf=True, symbol=sym, create_idx=i)
+             for i, (sym, w) in enumerate(zip(CHARS, weights))]
+    for idx in range(huffman_golden.NUM_LEAVES, huffman_golden.NUM_NODES):
+        left, right = sorted((n for n in range(idx) if parent[n] == idx), key=lambda n: bit[n])
+        nodes.append(Node(weight=nodes[left].weight + nodes[right].weight,
+                          is_leaf=False,
+                          left=nodes[left],
+                          right=nodes[right],
+                          create_idx=idx))
+    return huffman_golden.code_table(weights, "huffmancode"), nodes[huffman_golden.ROOT]
 
 
 # ------------------------------------------------------------
@@ -1,98 +1,24 @@
+import argparse
 import re
+import time
+from collections import OrderedDict
 
-# =============================================================================
-# 1. 基礎設定
-# =============================================================================
-CHAR_MAP = ['A', 'B', 'C', 'E', 'I', 'L', 'O', 'V']
-
-# Mode 0: I L O V E (ID: 4, 5, 6, 7, 3)
-# Mode 1: I C L A B (ID: 4, 2, 5, 0, 1)
-MODE_STRING_IDS = {
-    0: [4, 5, 6, 7, 3],
-    1: [4, 2, 5, 0, 1]
-}
+import numpy as np
 
-class Node:
-    def __init__(self, weight, id_num, left=None, right=None):
-        self.weight = weight
-        self.id = id_num
-        self.left = left
-        self.right = right
-
-    def __repr__(self):
-        return f"Node(w={self.weight}, id={self.id})"
+from huffman_golden import NUM_LEAVES, bitstream_lines, codebook_batch, mode_bitstream_batch
 
 # =============================================================================
-# 2. 核心邏輯：依照你的敘述建樹
+# 1. 核心邏輯：依照你的敘述建樹 (huffman_golden.py 的 "random" preset)
+#    排序規則：權重由大到小，ID 由小到大，每次從尾端取兩個
+#    -> 權重最小 / ID 最大的放右邊 (1)，次小的放左邊 (0)
+#    Leaf ID 0~7 (A B C E I L O V)，Internal node ID 從 8 開始
+#    Mode 0: I L O V E (ID: 4, 5, 6, 7, 3)
+#    Mode 1: I C L A B (ID: 4, 2, 5, 0, 1)
 # =============================================================================
-def build_huffman_tree_user_logic(weights):
-    # 步驟 1: 初始化 Leaf Nodes (ID 0~7)
-    nodes = []
-    for i, w in enumerate(weights):
-        nodes.append(Node(w, i))
-
-    next_internal_id = 8  # Internal node ID 從 8 開始
-
-    # 迴圈直到剩下一顆根節點
-    while len(nodes) > 1:
-        # A. 排序 (Sort)
-        # 規則：權重由大到小 (Descending)，ID 由小到大 (Ascending)
-        # 這樣 List 的尾端 (End) 就會是權重最小的
-        # Python sort 是 Ascending，所以 key 設定：
-        # weight 加負號變 Descending
-        # id 保持正號變 Ascending
-        # (x.weight, -x.id) 配合 reverse=True -> 權重(大->小), ID(小->大)
-        
-        # 讓我們用更直觀的寫法：
-        # 先排 ID (小到大)，再排 Weight (大到小)
-        # Python 的 sort 是穩定的，所以可以分兩次，或者用 tuple key
-        # 我們希望 List 左邊是 大權重，右邊是 小權重
-        # (7, 1) > (7, 7) ? 我們希望 (7, 1) 在前 (7, 7) 在後
-        # Tuple比較: (7, -1) > (7, -7). True.
-        
-        nodes.sort(key=lambda x: (x.weight, -x.id), reverse=True)
-        
-        # 檢查用 (Debug): 印出排序結果，看是否符合你的 "b v c e o a i l"
-        # print([f"{n.weight}({n.id})" for n in nodes])
-
-        # B. 合併 (Merge)
-        # 根據你的敘述： "w(o) > w(a) ... 所以 a 在右邊"
-        # 在我們的排序中，a (3) 會排在 o (5) 的後面 (List 的最右邊)
-        # 所以 pop() 出來的第一個是最右邊的元素 (Right Child)
-        
-        right_child = nodes.pop() # List 最後一個 (權重最小 / ID最大) -> 建 1
-        left_child = nodes.pop()  # List 倒數第二個 (權重次小)       -> 建 0
-
-        # C. 建立新節點
-        new_w = left_child.weight + right_child.weight
-        parent = Node(new_w, next_internal_id, left=left_child, right=right_child)
-        
-        # 放回 List 等待下一次 Sort
-        nodes.append(parent)
-        next_internal_id += 1
-
-    return nodes[0]  # Root
+RULE = "random"
 
 # =============================================================================
-# 3. 產生編碼表 (左0 右1)
-# =============================================================================
-def generate_codes(node, current_code="", table=None):
-    if table is None:
-        table = {}
-    
-    if node.left is None and node.right is None:
-        table[node.id] = current_code
-        return table
-
-    if node.left:
-        generate_codes(node.left, current_code + "0", table)
-    if node.right:
-        generate_codes(node.right, current_code + "1", table)
-    
-    return table
-
-# =============================================================================
-# 4. 檔案處理 (保持不變)
+# 2. 檔案處理 (保持不變)
 # =============================================================================
 def process_files(input_file, output_file):
     try:
@@ -100,7 +26,7 @@ def process_files(input_file, output_file):
             print(f"Processing {input_file}...")
             
             lines = f_in.readlines()
-            valid_count = 0
+            weights, modes = [], []
 
             for line in lines:
                 numbers = [int(n) for n in re.findall(r'\d+', line)]
@@ -109,29 +35,185 @@ def process_files(input_file, output_file):
                     continue
 
                 data = numbers[-9:]
-                weights = data[0:8]
-                mode = data[8]
-
-                # 1. 建樹 (使用新的邏輯)
-                root = build_huffman_tree_user_logic(weights)
-                
-                # 2. 產表
-                code_table = generate_codes(root)
-                
-                # 3. 輸出
-                target_ids = MODE_STRING_IDS[mode]
-                bitstream = ""
-                for char_id in target_ids:
-                    bitstream += code_table[char_id]
-
-                f_out.write(bitstream + "\n")
-                valid_count += 1
+                weights.append(data[0:8])
+                modes.append(data[8])
+
+            valid_count = len(modes)
+            if valid_count:
+                # 建樹、產表、輸出 (所有 pattern 一次 batch 算)
+                codes, lengths = codebook_batch(weights, RULE)
+                bits, nbits = mode_bitstream_batch(codes, lengths, modes)
+                f_out.write(bitstream_lines(bits, nbits))
+
+            print(f"Done! Processed {valid_count} valid patterns.")
+            print(f"Golden file generated at: {output_file}")
+
+    except FileNotFoundError:
+        print(f"Error: {input_file} not found.")
+
+# =============================================================================
+# 3. Streaming 模式：大檔案分塊讀、整塊一次 parse，codebook 走 LRU cache
+# =============================================================================
+CHUNK_BYTES = 1 << 23      # 每次讀入的 bytes
+CACHE_SIZE = 1 << 18       # LRU cache 最多記幾組 weight 的 codebook
+MAX_DIGITS = 18            # int64 能精確存下的位數
+_DIGIT = np.zeros(256, dtype=bool)
+_DIGIT[ord("0"):ord("9") + 1] = True
+_POW10 = 10 ** np.arange(MAX_DIGITS, dtype=np.int64)
+
+
+def parse_block(buf):
+    """
+    buf    : 以換行結尾的一段文字 (bytes)
+    return : weights (M, 8)、modes (M,)，規則同 process_files：
+             每行取出所有整數，少於 9 個的行略過，否則取最後 9 個
+             用到的數字超過 MAX_DIGITS 位時 raise ValueError (請改用非 streaming 模式)
+    """
+    b = np.frombuffer(buf, dtype=np.uint8)
+    is_digit = _DIGIT[b]
+    prev = np.concatenate(([False], is_digit[:-1]))
+    nxt = np.concatenate((is_digit[1:], [False]))
+    starts = np.flatnonzero(is_digit & ~prev)
+    ends = np.flatnonzero(is_digit & ~nxt)
+
+    # 每個數字：sum(digit * 10^(距離數字尾端的位數))，全程 int64；超過 MAX_DIGITS 位的先算成 0
+    pos = np.flatnonzero(is_digit)
+    num_id = np.cumsum(is_digit & ~prev)[pos] - 1
+    exp = ends[num_id] - pos
+    contrib = np.where(exp < MAX_DIGITS, (b[pos] - ord("0")) * _POW10[np.minimum(exp, MAX_DIGITS - 1)], 0)
+    values = np.add.reduceat(contrib, np.flatnonzero(~prev[pos])) if len(pos) else contrib
+    too_long = ends - starts + 1 > MAX_DIGITS
+
+    # 每個數字屬於第幾行，每行取最後 9 個
+    line_of = np.searchsorted(np.flatnonzero(b == ord("\n")), starts)
+    n_lines = int(line_of[-1]) + 1 if len(line_of) else 0
+    per_line = np.bincount(line_of, minlength=n_lines)
+    last = np.cumsum(per_line) - 1
+    keep = per_line >= 9
+    take = last[keep][:, None] + np.arange(-8, 1)
+    bad = take[too_long[take]]
+    if len(bad):
+        text = bytes(buf[starts[bad[0]]:ends[bad[0]] + 1]).decode()
+        raise ValueError(f"數字 {text} 超過 {MAX_DIGITS} 位，streaming 模式無法精確處理")
+    data = values[take]
+    return data[:, :NUM_LEAVES], data[:, NUM_LEAVES]
+
+
+def read_blocks(f, chunk_bytes=CHUNK_BYTES):
+    """以 'rb' 開啟的檔案 -> 逐塊 yield 以換行結尾的 bytes (最後一行沒有換行時補上)"""
+    rest = b""
+    while True:
+        data = f.read(chunk_bytes)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind(b"\n") + 1
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+    if rest:
+        yield rest + b"\n"
+
+
+class CodebookCache:
+    """
+    weight vector -> (codes, lengths) 的 LRU cache，沒命中的整批交給 codebook_batch。
+    codebook 存在預先配置的 (size, 8) 陣列裡，dict 只記 key -> slot，記憶體固定。
+    """
+
+    def __init__(self, rule, size=CACHE_SIZE):
+        self.rule = rule
+        self.size = size
+        self.slots = OrderedDict()
+        self.codes = np.zeros((size, NUM_LEAVES), dtype=np.uint32)
+        self.lengths = np.zeros((size, NUM_LEAVES), dtype=np.uint8)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, weights):
+        # 同一塊內重複的 weight 只查一次；weight 都在 0 ~ 255 時壓成一個 uint64 當 key
+        if len(weights) and weights.min() >= 0 and weights.max() < 256:
+            shift = np.arange(NUM_LEAVES, dtype=np.uint64) * np.uint64(8)
+            keys = (weights.astype(np.uint64) << shift).sum(axis=1)
+        else:
+            keys = np.ascontiguousarray(weights, dtype=np.int64).view(f"V{8 * NUM_LEAVES}").ravel()
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        keys = uniq.tolist() if uniq.dtype.kind == "u" else [u.tobytes() for u in uniq]
+
+        slot_of = np.zeros(len(uniq), dtype=np.int64)
+        miss = []
+        for u, key in enumerate(keys):
+            slot = self.slots.get(key)
+            if slot is None:
+                miss.append(u)
+            else:
+                self.slots.move_to_end(key)
+                slot_of[u] = slot
+
+        codes = self.codes[slot_of]
+        lengths = self.lengths[slot_of]
+        if miss:
+            miss = np.asarray(miss)
+            codes[miss], lengths[miss] = codebook_batch(weights[first[miss]], self.rule)
+            for u in miss.tolist():
+                if len(self.slots) < self.size:
+                    slot = len(self.slots)
+                else:
+                    _, slot = self.slots.popitem(last=False)
+                self.slots[keys[u]] = slot
+                self.codes[slot] = codes[u]
+                self.lengths[slot] = lengths[u]
+
+        # 每個 miss 的 weight 只有第一次出現算 miss，同一塊內的其他出現算命中
+        self.misses += len(miss)
+        self.hits += len(weights) - len(miss)
+        inverse = inverse.ravel()
+        return codes[inverse], lengths[inverse]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def process_files_stream(input_file, output_file, cache_size=CACHE_SIZE, chunk_bytes=CHUNK_BYTES):
+    """輸出與 process_files 相同；記憶體只跟 chunk_bytes 與 cache_size 有關"""
+    try:
+        with open(input_file, 'rb') as f_in, open(output_file, 'w', buffering=1 << 20) as f_out:
+            print(f"Processing {input_file} (streaming)...")
+            cache = CodebookCache(RULE, cache_size)
+            valid_count = 0
+            t0 = time.time()
+
+            for block in read_blocks(f_in, chunk_bytes):
+                weights, modes = parse_block(block)
+                if not len(modes):
+                    continue
+                codes, lengths = cache.lookup(weights)
+                bits, nbits = mode_bitstream_batch(codes, lengths, modes)
+                f_out.write(bitstream_lines(bits, nbits))
+                valid_count += len(modes)
 
+            dt = time.time() - t0
             print(f"Done! Processed {valid_count} valid patterns.")
+            print(f"Cache hit rate: {100 * cache.hit_rate:.2f}% ({cache.hits} hits / {cache.misses} misses)")
+            print(f"Throughput: {valid_count / dt if dt else 0:,.0f} lines/s ({dt:.2f} s)")
             print(f"Golden file generated at: {output_file}")
 
     except FileNotFoundError:
         print(f"Error: {input_file} not found.")
 
 if __name__ == "__main__":
-    process_files("input.txt", "golden.txt")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lab06 Huffman golden generator")
+    parser.add_argument("input", nargs="?", default="input.txt")
+    parser.add_argument("output", nargs="?", default="golden.txt")
+    parser.add_argument("--stream", action="store_true", help="大檔案用 streaming 模式 (分塊讀 + LRU cache)")
+    parser.add_argument("--cache", type=int, default=CACHE_SIZE, help="LRU cache 大小 (weight vector 數)")
+    args = parser.parse_args()
+    if args.cache < 1:
+        parser.error("--cache 至少要 1")
+
+    if args.stream:
+        process_files_stream(args.input, args.output, args.cache)
+    else:
+        process_files(args.input, args.output)
@@ -0,0 +1,274 @@
+import argparse
+import time
+
+import numpy as np
+
+# ==========================================
+# Lab07 跨時脈路徑的 transaction-level 模型
+#
+# handshake_sync (handshake.v) 與 async_fifo (ASYN FIFO.v) 都是「值在某個 edge 更新，
+# 另一個 domain 經過兩級 NDFF 後才看得到」，所以每筆傳輸的時間點可以直接用
+# 「t 之後的下一個 posedge」推出來，不必逐個 edge 模擬：
+#
+#   handshake (S = src 時脈，D = dst 時脈)
+#     req  : src_valid 與 dack_sync 皆就緒後的下一個 S edge，sreq 拉高
+#     fire : sreq 經 2 級 NDFF 到 D 域，再下一個 D edge 偵測到上升 -> dst_fire / dst_data / dack
+#     done : dack 經 2 級 NDFF 回 S 域，再下一個 S edge 放掉 sreq (hs_done_src 在此之前一個週期為 1)
+#     ready: sreq 放掉 -> 2 級 -> dack 放掉 -> 2 級回 S 域，之後的 S edge 才能送下一筆
+#
+#   async_fifo (W = 寫入時脈，R = 讀取時脈)
+#     write: 資料就緒、上一筆已寫、且第 k - depth 筆的讀取已經 2 級同步回 W 域 (不 full)
+#     pop  : 第 k 筆的寫入已 2 級同步到 R 域 (不 empty) 後，讀取端觀察到、再過 rd_lat 個週期讀出
+#
+# 註：ASYN FIFO.v 的 full / empty 由 *_ptr_gray_next 算出，而 *_next 又取決於 full / empty，
+#     是零延遲的組合迴路 (剩一筆時 rd_en = 1 會震盪)。模型採用無迴路的意圖：
+#     rd_ptr != 同步後的 wr_ptr 即可讀、wr_ptr - 同步後的 rd_ptr < depth 即可寫。
+#
+# 時間一律用整數 ps；時脈如 pattern.sv 從 0 開始每半週期反轉，第一個 posedge 在半週期處。
+# 輸出為 (傳輸筆數 K, lane 數 L)，一個 lane 是一組時脈 / depth 設定，兩個軸都向量化：
+#   handshake : req_k = max(A_k, H(req_{k-1}))，H 為「req 在 S edge e -> 下一筆最早的 req」。
+#               兩個時脈的 edge 每 lcm(S, D) 重複一次，H(e) - e 只跟 e 在這個週期內是第幾個
+#               S edge 有關，預先算好 H^(2^r) 的跳表，再用 prefix scan (log2 K 輪) 一次解出所有 req。
+#   fifo      : 不 full 時寫入 / 讀出都是「max(就緒時間, 上一筆 + 固定間隔)」，即 cumulative max；
+#               full 只跟 depth 筆之前的 pop 有關，所以一次處理 depth 筆，每塊內全部向量化。
+# ==========================================
+
+# pattern.sv 的預設週期 (ns)
+CLK1_PERIOD = 14.1
+CLK2_PERIOD = 3.9
+CLK3_PERIOD = 20.7
+FIFO_DEPTH = 1 << 8      # prng.v 的 async_fifo ADDR_WIDTH = 8
+NUM_OUTPUTS = 256
+
+# CLK_3_MODULE：IDLE / OUT 看到 !empty -> READ -> WAIT (pop) -> OUT，每 3 個週期讀一筆
+RD_GAP = 3
+RD_LAT = 2
+
+
+def clock(period_ns):
+    """週期 (ns) -> (period, phase) in ps；phase 為第一個 posedge 的時間"""
+    half = np.rint(np.asarray(period_ns, dtype=np.float64) * 500).astype(np.int64)
+    return 2 * half, half
+
+
+def next_edge(t, period, phase):
+    """t 之後 (不含 t) 的第一個 posedge：t 時更新的值，會在這個 edge 被取樣"""
+    n = np.maximum((t - phase) // period + 1, 0)
+    return phase + n * period
+
+
+def cycles(t, period, phase):
+    """posedge 時間 -> 該時脈的第幾個週期 (第一個 posedge 為 0)"""
+    return (t - phase) // period
+
+
+def _lanes(*arrays):
+    """時脈 / depth 參數 broadcast 成長度 L 的 1 維陣列"""
+    return np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=np.int64)) for x in arrays))
+
+
+def _avail(avail, num_lanes):
+    """(K,) 或 (K, L) -> (K, L)"""
+    avail = np.asarray(avail, dtype=np.int64)
+    if avail.ndim == 1:
+        avail = avail[:, None]
+    return np.broadcast_to(avail, (len(avail), num_lanes))
+
+
+# ==========================================
+# handshake_sync
+# ==========================================
+def _handshake_step(req, S, s0, D, d0):
+    """req 拉高的 S edge -> fire、done、ready"""
+    fire = next_edge(req, D, d0) + 2 * D      # 2 級 NDFF + 上升偵測
+    done = next_edge(fire, S, s0) + 2 * S     # dack 2 級 NDFF + src FSM
+    ack_low = next_edge(done, D, d0) + 2 * D  # sreq 放掉 -> 2 級 -> dack 放掉
+    ready = next_edge(ack_low, S, s0) + S     # dack 放掉 -> 2 級
+    return fire, done, ready
+
+
+def _jump_tables(S, s0, D, d0, levels):
+    """
+    lane l 的 S edge 每 m_l = lcm(S, D) / S 個重複一次，狀態 = 全域編號 base_l + (edge 編號 mod m_l)
+    return : base、m、adv (levels, 狀態數)，adv[r][s] 為從狀態 s 連續送 2^r 筆 req 前進的時間
+    """
+    m = D // np.gcd(S, D)
+    base = np.cumsum(m) - m
+    lane = np.repeat(np.arange(len(m)), m)
+    s = np.arange(int(m.sum())) - base[lane]
+    e = s0[lane] + s * S[lane]
+    ready = _handshake_step(e, S[lane], s0[lane], D[lane], d0[lane])[2]
+    adv = ready + S[lane] - e                 # 資料一直就緒時，下一筆在 ready 之後的 S edge 送
+    up = base[lane] + (s + adv // S[lane]) % m[lane]
+    advs = [adv]
+    for _ in range(levels - 1):
+        adv, up = adv + adv[up], up[up]
+        advs.append(adv)
+    return base, m, np.array(advs)
+
+
+def handshake_model(avail, src_period, dst_period, start=0):
+    """
+    avail      : (K, L) 或 (K,)，第 k 筆 src_valid 拉高的時間 (ps)；之後的 S edge 才看得到
+    src_period : (L,) src 時脈週期 (ns)
+    dst_period : (L,) dst 時脈週期 (ns)
+    start      : reset 放開的時間 (ps)
+    return     : dict of (K, L) int64 (ps)
+                   req  : sreq 拉高的 S edge
+                   fire : dst_fire / dst_data 更新的 D edge (dst 端資料依 k 的順序出現)
+                   done : sreq 放掉的 S edge (hs_done_src 在前一個 S 週期為 1)
+                   ready: dack_sync 回到 0 的 S edge，之後才能開始下一筆
+    """
+    (S, s0), (D, d0) = clock(src_period), clock(dst_period)
+    S, s0, D, d0 = _lanes(S, s0, D, d0)
+    avail = _avail(avail, len(S))
+    num = len(avail)
+
+    # ready 一定是 S edge，所以 next_S(max(avail, ready)) = max(next_S(avail), ready + S)
+    req = next_edge(np.maximum(avail, start), S, s0)
+    if (D // np.gcd(S, D)).sum() > req.size:
+        # lane 多、每個 lane 的筆數少：跳表比輸出還大，直接逐筆前進 (每步仍是所有 lane 一起算)
+        for k in range(1, num):
+            req[k] = np.maximum(req[k], _handshake_step(req[k - 1], S, s0, D, d0)[2] + S)
+    else:
+        # prefix scan：第 r 輪後 req[k] = max(A_k, H^(2^r)(req[k - 2^r]))，k < 2^(r+1) 的已是最終值
+        levels = max(int(num - 1).bit_length(), 1)
+        base, m, adv = _jump_tables(S, s0, D, d0, levels)
+        span = 1
+        for r in range(levels):
+            if span >= num:
+                break
+            prev = req[:-span]
+            state = base + (prev - s0) // S % m
+            req[span:] = np.maximum(req[span:], prev + adv[r][state])
+            span *= 2
+
+    fire, done, ready = _handshake_step(req, S, s0, D, d0)
+    return {"req": req, "fire": fire, "done": done, "ready": ready}
+
+
+# ==========================================
+# async_fifo
+# ==========================================
+def fifo_model(avail, wr_period, rd_period, depth=FIFO_DEPTH, rd_gap=RD_GAP, rd_lat=RD_LAT, start=0):
+    """
+    avail     : (K, L) 或 (K,)，第 k 筆資料在寫入端就緒的時間 (ps)；之後的 W edge 才能寫
+    wr_period : (L,) 寫入時脈週期 (ns)
+    rd_period : (L,) 讀取時脈週期 (ns)
+    depth     : (L,) 或 int，FIFO 深度 (2 的次方)
+    rd_gap    : 讀取端連續兩次 pop 至少相隔幾個 R 週期 (1 = 每週期都讀)
+    rd_lat    : 讀取端看到 !empty 之後再過幾個 R 週期才 pop
+    return    : dict of (K, L) int64 (ps)
+                  write : 寫入 (wr_ptr + 1) 的 W edge
+                  pop   : 讀出 (rd_data 更新、rd_ptr + 1) 的 R edge
+                  stall : 因為 full 多等的 W 週期數
+    """
+    (W, w0), (R, r0) = clock(wr_period), clock(rd_period)
+    W, w0, R, r0, depth = _lanes(W, w0, R, r0, depth)
+    avail = _avail(avail, len(W))
+    num = len(avail)
+    write = np.empty(avail.shape, dtype=np.int64)
+    pop = np.zeros(avail.shape, dtype=np.int64)
+    stall = np.empty(avail.shape, dtype=np.int64)
+    col = np.arange(len(W))
+
+    # 第 k 筆的 full 只看第 k - depth 筆的 pop，一塊 min(depth) 筆內彼此不相依
+    blk = max(int(depth.min()), 1)
+    w_next = next_edge(np.full(len(W), start, dtype=np.int64), W, w0)   # 下一筆最早可寫的 W edge
+    o_next = next_edge(np.full(len(W), start, dtype=np.int64), R, r0)   # 下一筆最早可 observe 的 R edge
+    for k0 in range(0, num, blk):
+        k1 = min(k0 + blk, num)
+        j = np.arange(k1 - k0)[:, None]
+        a = np.maximum(avail[k0:k1], start)
+
+        # 不 full：第 k - depth 筆的 pop 經 2 級 NDFF 回到 W 域
+        old = k0 + j - depth
+        t_old = pop[np.maximum(old, 0), col]
+        free = np.where(old >= 0, next_edge(t_old, W, w0) + W, start)
+
+        # write_k = max(next_W(max(avail, free)), write_{k-1} + W)
+        x = next_edge(np.maximum(a, free), W, w0) - j * W
+        x[0] = np.maximum(x[0], w_next)
+        w = np.maximum.accumulate(x, axis=0) + j * W
+        ok = np.maximum(next_edge(a, W, w0), np.concatenate([w_next[None], w[:-1] + W]))
+
+        # 不 empty：第 k 筆的寫入經 2 級 NDFF 到 R 域；obs_k = max(next_R(seen), obs_{k-1} + rd_gap R)
+        seen = next_edge(w, R, r0) + R
+        y = next_edge(np.maximum(seen, start), R, r0) - j * rd_gap * R
+        y[0] = np.maximum(y[0], o_next)
+        obs = np.maximum.accumulate(y, axis=0) + j * rd_gap * R
+
+        write[k0:k1] = w
+        stall[k0:k1] = (w - ok) // W
+        pop[k0:k1] = obs + rd_lat * R
+        w_next = w[-1] + W
+        o_next = obs[-1] + rd_gap * R
+    return {"write": write, "pop": pop, "stall": stall}
+
+
+# ==========================================
+# 掃描
+# ==========================================
+def sweep(src_periods, dst_periods, depths, num, mode):
+    """
+    所有 (src, dst, depth) 組合各當一個 lane，一次跑完
+    mode : "handshake" 或 "fifo" (fifo 模式資料在第 0 個 W edge 之前就全部就緒)
+    return: (設定 (L, 3)、dict of (num, L))
+    """
+    grid = np.array(np.meshgrid(src_periods, dst_periods, depths, indexing="ij")).reshape(3, -1)
+    src, dst, depth = grid[0], grid[1], grid[2].astype(np.int64)
+    avail = np.zeros(num, dtype=np.int64)
+    if mode == "handshake":
+        res = handshake_model(avail, src, dst)
+    else:
+        res = fifo_model(avail, src, dst, depth)
+    return grid.T, res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab07 CDC transaction-level model")
+    parser.add_argument("mode", choices=["handshake", "fifo"])
+    parser.add_argument("--src", type=float, nargs="+", default=None, help="src / 寫入時脈週期 (ns)")
+    parser.add_argument("--dst", type=float, nargs="+", default=None, help="dst / 讀取時脈週期 (ns)")
+    parser.add_argument("--depth", type=int, nargs="+", default=[FIFO_DEPTH], help="FIFO 深度 (fifo 模式)")
+    parser.add_argument("--num", type=int, default=NUM_OUTPUTS, help="每個設定傳幾筆")
+    args = parser.parse_args()
+    if args.num < 1:
+        parser.error("--num 至少要 1")
+    if any(clock(p)[0] <= 0 for p in (args.src or []) + (args.dst or [])):
+        parser.error("--src / --dst 的週期必須大於 0 (解析度 0.002 ns)")
+    if any(d < 2 or d & (d - 1) for d in args.depth):
+        parser.error("--depth 必須是 2 的次方且至少為 2 (async_fifo 的 ADDR_WIDTH >= 1)")
+
+    if args.mode == "handshake":
+        src = args.src or [CLK1_PERIOD]
+        dst = args.dst or [CLK2_PERIOD]
+        depths = [0]
+    else:
+        src = args.src or [CLK2_PERIOD]
+        dst = args.dst or [CLK3_PERIOD]
+        depths = args.depth
+
+    t0 = time.time()
+    grid, res = sweep(src, dst, depths, args.num, args.mode)
+    dt = time.time() - t0
+
+    last = res["fire"] if args.mode == "handshake" else res["pop"]
+    D, d0 = clock(grid[:, 1])
+    print(f"{'src ns':>8s}  {'dst ns':>8s}  {'depth':>5s}  {'first':>7s}  {'last':>9s}  {'cyc/xfer':>9s}  {'stall':>7s}")
+    for i, (s, d, dep) in enumerate(grid):
+        c = cycles(last[:, i], D[i], d0[i])
+        per = (c[-1] - c[0]) / max(len(c) - 1, 1)
+        if args.mode == "fifo":
+            dep, stall = f"{int(dep):5d}", f"{int(res['stall'][:, i].sum()):7d}"
+        else:
+            dep, stall = f"{'-':>5s}", f"{'-':>7s}"
+        print(f"{s:8.2f}  {d:8.2f}  {dep}  {c[0]:7d}  {c[-1]:9d}  {per:9.3f}  {stall}")
+
+    total = last.size
+    print(f"\n{grid.shape[0]} 組設定 x {args.num} 筆 = {total:,} 筆傳輸，耗時 {dt:.3f} s "
+          f"({total / dt / 1e6:.2f} M 筆/s)")
+
+
+if __name__ == "__main__":
+    main()
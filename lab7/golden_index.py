@@ -0,0 +1,221 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from xorshift import NUM_OUTPUTS, load_seeds, xorshift_lanes, xorshift_step, xorshift_unstep
+
+# ==========================================
+# Lab07 golden 反查索引
+#
+# prng.v 吐出錯的值時，只知道那個 uint32。這支 script 把 seed golden.py 產生的
+# 整條 golden 串流 (每個 seed x NUM_OUTPUTS 筆) 依數值排序存成 binary 索引，
+# 之後用 memory-map 開啟，輸入一個值就能查出是哪個 seed 的第幾個輸出、前後是什麼。
+# 查不到的值會用 xorshift_step / xorshift_unstep 往前、往後走幾步再查，
+# 判斷是不是某個 seed 多走或少走了幾步。
+#
+# 檔案格式 (little endian)：
+#   header  64 bytes : magic "LAB7GIDX"、格式版本 (u4)、每個 seed 的輸出數 (u4)、seed 數 (u8)、record 數 (u8)
+#   seeds   u4 x seed 數 (補齊到 8 bytes)
+#   offsets u8 x (65536 + 1)，數值高 16 bit 為 b 的 record 位於 [offsets[b], offsets[b + 1])
+#   records (value u4, seed u4, step u4) x record 數，依 value 排序，相同 value 依 (seed, step) 排序
+#   seed 欄位是 seed 在 seeds 中的編號，step 為 0 起算的輸出位置
+# ==========================================
+MAGIC = b"LAB7GIDX"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+BUCKET_BITS = 16
+BUCKETS = 1 << BUCKET_BITS
+
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("num_outputs", "<u4"),
+                   ("num_seeds", "<u8"), ("count", "<u8")])
+RECORD = np.dtype([("value", "<u4"), ("seed", "<u4"), ("step", "<u4")])
+
+BUILD_CHUNK = 1 << 14    # 一次推進的 seed 數
+SORT_CHUNK = 1 << 22     # 排序時一次載入的 record 數 (以 bucket 為單位切)
+
+
+def _layout(num_seeds):
+    seeds_off = HEADER_SIZE
+    offsets_off = seeds_off + (num_seeds * 4 + 7) // 8 * 8
+    records_off = offsets_off + (BUCKETS + 1) * 8
+    return seeds_off, offsets_off, records_off
+
+
+def _chunk_records(seeds, base, num_outputs):
+    """seeds[base:base + n] 的整段輸出 -> 未排序的 record"""
+    vals = xorshift_lanes(seeds, num_outputs)
+    n = len(seeds)
+    rec = np.empty(n * num_outputs, dtype=RECORD)
+    rec["value"] = vals.ravel()
+    rec["seed"] = np.repeat(np.arange(base, base + n, dtype=np.uint32), num_outputs)
+    rec["step"] = np.tile(np.arange(num_outputs, dtype=np.uint32), n)
+    return rec
+
+
+# ==========================================
+# Build
+# ==========================================
+def build_index(seeds, num_outputs=NUM_OUTPUTS, path="golden_index.bin", chunk=BUILD_CHUNK):
+    """
+    兩次產生串流 (推進 lane 比讀寫檔便宜)：
+      1. 統計每個 bucket (數值高 16 bit) 的 record 數 -> offsets
+      2. 依 offsets 把 record 直接寫到 memmap 中對應 bucket 的位置
+    最後每次載入一段連續的 bucket 依 value 做 stable sort。
+    """
+    seeds = np.asarray(seeds, dtype=np.uint32)
+    count = len(seeds) * num_outputs
+    seeds_off, offsets_off, records_off = _layout(len(seeds))
+    t0 = time.time()
+
+    hist = np.zeros(BUCKETS, dtype=np.int64)
+    for s in range(0, len(seeds), chunk):
+        vals = xorshift_lanes(seeds[s:s + chunk], num_outputs)
+        hist += np.bincount((vals >> BUCKET_BITS).ravel(), minlength=BUCKETS)
+    offsets = np.zeros(BUCKETS + 1, dtype=np.uint64)
+    np.cumsum(hist, out=offsets[1:])
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, FORMAT_VERSION, num_outputs, len(seeds), count)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        f.write(seeds.astype("<u4").tobytes().ljust(offsets_off - seeds_off, b"\0"))
+        f.write(offsets.astype("<u8").tobytes())
+        f.truncate(records_off + count * RECORD.itemsize)
+
+    records = np.memmap(tmp, dtype=RECORD, mode="r+", offset=records_off, shape=(count,))
+    fill = offsets[:-1].astype(np.int64)
+    for s in range(0, len(seeds), chunk):
+        rec = _chunk_records(seeds[s:s + chunk], s, num_outputs)
+        bucket = rec["value"] >> BUCKET_BITS
+        order = np.argsort(bucket, kind="stable")
+        rec, bucket = rec[order], bucket[order]
+        n_b = np.bincount(bucket, minlength=BUCKETS)
+        first = np.cumsum(n_b) - n_b
+        records[fill[bucket] + np.arange(len(rec)) - first[bucket]] = rec
+        fill += n_b
+        print(f"\r[scatter] {min(s + chunk, len(seeds)):,} / {len(seeds):,} seeds  ({time.time() - t0:.1f} s)",
+              end="", flush=True)
+    print()
+
+    # 以 bucket 為界切成約 SORT_CHUNK 大小的段落，各段獨立排序
+    cuts = np.searchsorted(offsets, np.arange(0, count, SORT_CHUNK, dtype=np.uint64), side="right") - 1
+    bounds = np.unique(np.concatenate([offsets[cuts], [count]]).astype(np.int64))
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        part = np.array(records[lo:hi])
+        records[lo:hi] = part[np.argsort(part["value"], kind="stable")]
+    records.flush()
+    del records
+    os.replace(tmp, path)
+    print(f"[index] {count:,} records ({len(seeds):,} seeds x {num_outputs}) saved to {path} "
+          f"({os.path.getsize(path) / 2 ** 20:.1f} MiB, {time.time() - t0:.1f} s)")
+    return path
+
+
+# ==========================================
+# Load / query
+# ==========================================
+class GoldenIndex:
+    def __init__(self, path="golden_index.bin"):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path}: 不是 Lab07 golden 索引")
+        h = header[0]
+        if int(h["version"]) != FORMAT_VERSION:
+            raise ValueError(f"{path}: 格式版本 {int(h['version'])} != {FORMAT_VERSION}，請重建")
+
+        self.num_outputs = int(h["num_outputs"])
+        num_seeds = int(h["num_seeds"])
+        seeds_off, offsets_off, records_off = _layout(num_seeds)
+        self.seeds = np.memmap(path, dtype="<u4", mode="r", offset=seeds_off, shape=(num_seeds,))
+        self.offsets = np.fromfile(path, dtype="<u8", count=BUCKETS + 1, offset=offsets_off).astype(np.int64)
+        self.records = np.memmap(path, dtype=RECORD, mode="r", offset=records_off, shape=(int(h["count"]),))
+        self.values = self.records["value"]
+
+    def lookup(self, value):
+        """value 在 golden 串流中出現的所有位置 -> record array (seed 編號, step)"""
+        value = int(value) & 0xFFFFFFFF
+        b = value >> BUCKET_BITS
+        lo, hi = self.offsets[b], self.offsets[b + 1]
+        vals = self.values[lo:hi]
+        i = np.searchsorted(vals, value, side="left")
+        j = np.searchsorted(vals, value, side="right")
+        return np.array(self.records[lo + i:lo + j])
+
+    def neighbors(self, value, before, after):
+        """value 往前 before 步到往後 after 步的值 (依序，共 before + 1 + after 個)"""
+        p = np.array([value], dtype=np.uint32)
+        n = p.copy()
+        back, fwd = [], []
+        for _ in range(before):
+            p = xorshift_unstep(p)
+            back.append(int(p[0]))
+        for _ in range(after):
+            fwd.append(int(xorshift_step(n)[0]))
+        return back[::-1] + [int(value)] + fwd
+
+    def trace(self, value, max_steps):
+        """
+        查不到時往前 / 往後走最多 max_steps 步再查，回傳步數最少的那幾筆
+        return : [(d, record)]，value 等於該 record 的輸出再往後走 d 步 (d < 0 表示往前)
+        """
+        back = np.array([value], dtype=np.uint32)
+        fwd = back.copy()
+        for d in range(1, max_steps + 1):
+            back = xorshift_unstep(back)
+            xorshift_step(fwd)
+            hits = [(d, r) for r in self.lookup(back[0])] + [(-d, r) for r in self.lookup(fwd[0])]
+            if hits:
+                return hits
+        return []
+
+
+def report(index, value, window, max_steps):
+    t0 = time.perf_counter()
+    hits = index.lookup(value)
+    dt = (time.perf_counter() - t0) * 1e6
+    print(f"{value:08X}: {len(hits)} 筆 ({dt:.1f} us)")
+    for r in hits:
+        seed, step = int(r["seed"]), int(r["step"])
+        before = min(window, step)
+        around = index.neighbors(value, before, min(window, index.num_outputs - 1 - step))
+        text = " ".join(f"[{v:08X}]" if k == before else f"{v:08X}" for k, v in enumerate(around))
+        print(f"  seed #{seed} ({int(index.seeds[seed])}) 第 {step} 個輸出  (第 {step - before} 個起): {text}")
+    if len(hits) or not max_steps:
+        return
+
+    t0 = time.perf_counter()
+    near = index.trace(value, max_steps)
+    dt = (time.perf_counter() - t0) * 1e6
+    if not near:
+        print(f"  前後 {max_steps} 步內都不在 golden 串流中 ({dt:.1f} us)")
+    for d, r in near:
+        seed, step = int(r["seed"]), int(r["step"])
+        what = f"多走了 {d} 步" if d > 0 else f"少走了 {-d} 步"
+        print(f"  = seed #{seed} ({int(index.seeds[seed])}) 第 {step} 個輸出{what} "
+              f"(即第 {step + d} 個輸出，{dt:.1f} us)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab07 golden reverse lookup")
+    parser.add_argument("values", nargs="*", help="要查的 32-bit 值 (16 進位)")
+    parser.add_argument("--index", default="golden_index.bin", help="索引檔")
+    parser.add_argument("--build", action="store_true", help="依 --seeds / --outputs 重建索引")
+    parser.add_argument("--seeds", default="seeds.txt", help="seed generaiton.py 產生的 seed 檔")
+    parser.add_argument("--outputs", type=int, default=NUM_OUTPUTS, help="每個 seed 產生的輸出數")
+    parser.add_argument("--window", type=int, default=2, help="顯示前後幾個輸出")
+    parser.add_argument("--trace", type=int, default=16, help="查不到時往前 / 往後最多走幾步")
+    args = parser.parse_args()
+
+    if args.build or not os.path.exists(args.index):
+        build_index(load_seeds(args.seeds), args.outputs, args.index)
+    if args.values:
+        index = GoldenIndex(args.index)
+        for v in args.values:
+            report(index, int(v, 16), args.window, args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,44 @@
+import argparse
+import os
 import sys
 
-def generate_golden():
-    # 根據 Spec 定義 Xorshift 參數 [cite: 59]
-    a, b, c = 13, 17, 5
-    
-    # 你提供的 10 組 Seed [cite: 135]
-    seeds = [12345, 67890, 13579, 24680, 11223, 44556, 99887, 77665, 33221, 55443]
-    
-    # 用來存放所有結果的列表
-    all_results = []
-
-    for s in seeds:
-        x = s & 0xFFFFFFFF  # 確保初始 Seed 是 32-bit [cite: 135]
-        
-        # 每組 Seed 產生 256 個隨機數 [cite: 17, 139]
-        for _ in range(256):
-            # 依照 Spec 步驟進行 Xorshift 運算 [cite: 44, 48, 51, 53]
-            # 步驟 i: X = X ^ (X << a)
-            x = (x ^ (x << a)) & 0xFFFFFFFF
-            # 步驟 ii: X = X ^ (X >> b)
-            x = (x ^ (x >> b)) & 0xFFFFFFFF
-            # 步驟 iii: X = X ^ (X << c)
-            x = (x ^ (x << c)) & 0xFFFFFFFF
-            
-            all_results.append(x)
-
-    # 將結果寫入檔案，方便 Verilog 用 $readmemh 讀取
+# hex 批次輸出與 lab8 共用 (lab8/hex_emit.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab8"))
+from hex_emit import BUF_SIZE, write_hex
+from xorshift import JUMP_BITS, NUM_OUTPUTS, load_seeds, xorshift_lanes
+
+LANE_CHUNK = 1 << 16     # 一次並行推進的 seed 數
+
+
+def generate_golden(seeds, num_outputs=NUM_OUTPUTS, path="golden_data.txt", chunk=LANE_CHUNK, start=0):
+    """依 seed 順序、每個 seed 連續 num_outputs 筆 (從第 start 筆開始)，逐段寫入 golden 檔"""
+    # 輸出成 8 位數的 16 進位格式 (不加 0x)，方便 Verilog 用 $readmemh 讀取
+    with open(path, "wb", buffering=BUF_SIZE) as f:
+        for s in range(0, len(seeds), chunk):
+            write_hex(f, xorshift_lanes(seeds[s:s + chunk], num_outputs, start), upper=True)
+    return len(seeds) * num_outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab07 xorshift golden generator")
+    parser.add_argument("--seeds", default="seeds.txt", help="seed generaiton.py 產生的 seed 檔")
+    parser.add_argument("--outputs", type=int, default=NUM_OUTPUTS, help="每個 seed 產生的輸出數")
+    parser.add_argument("--start", type=int, default=0, help="從每個 seed 的第幾個輸出開始 (O(log k) jump-ahead)")
+    parser.add_argument("--out", default="golden_data.txt")
+    args = parser.parse_args()
+    if args.outputs < 1:
+        parser.error("--outputs 至少要 1")
+    if not 0 <= args.start < 1 << JUMP_BITS:
+        parser.error(f"--start 需介於 0 與 2^{JUMP_BITS} - 1 之間")
+
+    seeds = load_seeds(args.seeds)
+
     try:
-        with open("golden_data.txt", "w") as f:
-            for val in all_results:
-                # 輸出成 8 位數的 16 進位格式 (不加 0x)
-                f.write(f"{val:08X}\n")
-        print(f"成功！已產生 {len(all_results)} 筆資料並存入 golden_data.txt")
+        total = generate_golden(seeds, args.outputs, args.out, start=args.start)
+        print(f"成功！已產生 {total} 筆資料 ({len(seeds)} 組 seed x {args.outputs}) 並存入 {args.out}")
     except IOError as e:
         print(f"檔案寫入失敗: {e}")
 
-if __name__ == "__main__":
-    generate_golden()
-
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+
+# ==========================================
+# Lab07 Xorshift (13, 17, 5) 共用核心
+#
+# X = X ^ (X << a); X = X ^ (X >> b); X = X ^ (X << c) 在 GF(2) 上是線性的，
+# 一步就是一個 32x32 的 bit 矩陣 T，走 k 步等於乘上 T^k。
+# 矩陣以「32 個 column (uint32)」表示：T x = XOR(col[i] for x 的第 i bit 為 1)。
+# 預先算好 T^(2^j)，每個矩陣再拆成 4 張 256 格的 byte 查表，
+# 套用一次矩陣只要 4 次查表 + 3 次 XOR，跳 k 步為 O(log k)。
+# ==========================================
+
+# 根據 Spec 定義 Xorshift 參數 [cite: 59]
+XORSHIFT = (13, 17, 5)
+NUM_OUTPUTS = 256        # 每組 Seed 產生 256 個隨機數 [cite: 17, 139]
+JUMP_BITS = 64           # 支援的最大跳躍步數為 2^64 - 1
+
+# seeds.txt 不存在時使用的 10 組 Seed [cite: 135]
+DEFAULT_SEEDS = [12345, 67890, 13579, 24680, 11223, 44556, 99887, 77665, 33221, 55443]
+
+
+def read_seeds(path):
+    """seed generaiton.py 產生的 seeds.txt (每行一個十進位整數) -> uint32 array"""
+    with open(path) as f:
+        seeds = np.array(f.read().split(), dtype=np.uint64)
+    return (seeds & 0xFFFFFFFF).astype(np.uint32)  # 確保初始 Seed 是 32-bit [cite: 135]
+
+
+def load_seeds(path):
+    """有 seed 檔就讀檔，沒有就退回 DEFAULT_SEEDS"""
+    if os.path.exists(path):
+        return read_seeds(path)
+    print(f"找不到 {path}，改用內建的 {len(DEFAULT_SEEDS)} 組 seed")
+    return np.array(DEFAULT_SEEDS, dtype=np.uint32)
+
+
+def xorshift_step(x):
+    """所有 lane 同時走一步 (uint32 運算，左移溢位自動截掉)"""
+    a, b, c = (np.uint32(s) for s in XORSHIFT)
+    # 依照 Spec 步驟進行 Xorshift 運算 [cite: 44, 48, 51, 53]
+    x ^= x << a   # 步驟 i:   X = X ^ (X << a)
+    x ^= x >> b   # 步驟 ii:  X = X ^ (X >> b)
+    x ^= x << c   # 步驟 iii: X = X ^ (X << c)
+    return x
+
+
+def _unshift_left(y, s):
+    """y = x ^ (x << s) 的反運算：每次多還原 s 個低位 bit"""
+    x = y.copy()
+    for _ in range(32 // s):
+        x = y ^ (x << s)
+    return x
+
+
+def _unshift_right(y, s):
+    """y = x ^ (x >> s) 的反運算：每次多還原 s 個高位 bit"""
+    x = y.copy()
+    for _ in range(32 // s):
+        x = y ^ (x >> s)
+    return x
+
+
+def xorshift_unstep(x):
+    """xorshift_step 的反函數：所有 lane 同時往回走一步"""
+    a, b, c = (np.uint32(s) for s in XORSHIFT)
+    x = np.asarray(x, dtype=np.uint32)
+    x = _unshift_left(x, c)    # 還原步驟 iii
+    x = _unshift_right(x, b)   # 還原步驟 ii
+    return _unshift_left(x, a) # 還原步驟 i
+
+
+def xorshift_lanes(seeds, num_outputs=NUM_OUTPUTS, start=0):
+    """
+    seeds  : (N,) uint32，每個 seed 一個 lane
+    start  : 從第 start 個輸出開始 (先用 jump-ahead 跳過前面的 start 步)
+    return : (N, num_outputs) uint32，第 i 列為 seed i 依序產生的輸出
+    """
+    x = jump(seeds, start) if start else np.array(seeds, dtype=np.uint32)
+    out = np.empty((num_outputs, len(x)), dtype=np.uint32)
+    for k in range(num_outputs):
+        out[k] = xorshift_step(x)
+    return out.T
+
+
+# ==========================================
+# GF(2) 矩陣
+# ==========================================
+def step_matrix():
+    """T 的 32 個 column：col[i] = T e_i"""
+    return xorshift_step(np.uint32(1) << np.arange(32, dtype=np.uint32))
+
+
+def mat_apply(cols, x):
+    """cols (n,) 的矩陣乘上 x 的低 n bit (x 為任意 shape 的 uint32)"""
+    x = np.asarray(x, dtype=np.uint32)
+    out = np.zeros(x.shape, dtype=np.uint32)
+    for i in range(len(cols)):
+        out ^= np.where((x >> np.uint32(i)) & np.uint32(1), cols[i], np.uint32(0))
+    return out
+
+
+def mat_mul(a, b):
+    """(a b) 的 column = a 乘上 b 的 column"""
+    return mat_apply(a, b)
+
+
+def byte_tables(cols):
+    """矩陣 -> (4, 256) 查表，T x = tab[0][x & 255] ^ tab[1][(x >> 8) & 255] ^ ..."""
+    v = np.arange(256, dtype=np.uint32)
+    return np.stack([mat_apply(cols[8 * k:8 * k + 8], v) for k in range(4)])
+
+
+def _build_jump_tables():
+    tables = np.empty((JUMP_BITS, 4, 256), dtype=np.uint32)
+    cols = step_matrix()
+    for j in range(JUMP_BITS):
+        tables[j] = byte_tables(cols)
+        cols = mat_mul(cols, cols)          # T^(2^(j+1))
+    return tables
+
+
+JUMP_TABLES = _build_jump_tables()          # JUMP_TABLES[j] 為 T^(2^j)
+
+
+def _apply_tables(tab, x):
+    return (tab[0][x & 0xFF] ^ tab[1][(x >> 8) & 0xFF] ^
+            tab[2][(x >> 16) & 0xFF] ^ tab[3][x >> 24])
+
+
+# ==========================================
+# Jump-ahead
+# ==========================================
+def jump(seeds, k):
+    """
+    seeds : uint32 (任意 shape)
+    k     : 步數，可與 seeds broadcast (0 <= k < 2^64)
+    return: 每個 seed 走 k 步之後的狀態
+    """
+    x, k = np.broadcast_arrays(np.asarray(seeds, dtype=np.uint32), np.asarray(k, dtype=np.uint64))
+    x = x.copy()
+    k = k.copy()
+    for j in range(JUMP_BITS):
+        take = (k & np.uint64(1)).astype(bool)
+        if take.any():
+            x[take] = _apply_tables(JUMP_TABLES[j], x[take])
+        k >>= np.uint64(1)
+        if not k.any():
+            break
+    return x
+
+
+def output_at(seeds, index):
+    """golden 串流中第 index 個輸出 (0 起算，第 0 個為走 1 步後的值)"""
+    return jump(seeds, np.asarray(index, dtype=np.uint64) + np.uint64(1))
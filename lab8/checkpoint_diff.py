@@ -0,0 +1,171 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from snn_golden import STAGE_NAMES
+from hex_emit import read_hex, write_hex_file
+
+# ==========================================
+# Lab08 Checkpoint 比對工具
+#
+# 把 golden_<stage>.dat 與 RTL 端同格式的 dump 逐 stage 比對，
+# 每個 pattern 回報第一個出錯的 pipeline stage。
+# 檔案以 memory-map 讀入，hex 欄位整檔一次轉成 uint32，比對全部向量化。
+# ==========================================
+
+# 每個 pattern 在各 stage 檔案中的行數 (img0 + img1)
+LINES_PER_PAT = {'conv': 32, 'eq': 32, 'pool': 8, 'fc': 8, 'norm': 8, 'act': 8}
+
+
+def ulp_distance(a, b):
+    """兩組 float32 bit pattern 之間相差幾個 ulp (+0 / -0 視為相同)"""
+    def ordered(x):
+        x = x.view(np.int32).astype(np.int64)
+        return np.where(x < 0, np.int64(-0x80000000) - x, x)
+    return np.abs(ordered(a) - ordered(b))
+
+
+def _pattern_rows(bits, valid, ids, per_pat):
+    """
+    逐行 -> 每個 pattern 一列 (P, per_pat)；最後不完整的 pattern 補成無效值
+    pattern 編號取該 pattern 第一行的 "// pat{p}"，沒有標記時依出現順序為 0, 1, 2 ...
+    """
+    pad = -len(bits) % per_pat
+    bits = np.concatenate([bits, np.zeros(pad, dtype=bits.dtype)]).reshape(-1, per_pat)
+    valid = np.concatenate([valid, np.zeros(pad, dtype=bool)]).reshape(-1, per_pat)
+    pat = np.concatenate([ids, np.full(pad, -1)]).reshape(-1, per_pat)[:, 0]
+    pat = np.where(pat < 0, np.arange(len(pat)), pat)
+    return pat, bits, valid
+
+
+def compare_stage(golden_path, rtl_path, per_pat, ulp):
+    """
+    golden 可以只有部分 pattern (--checkpoints-for)，RTL 通常每個 pattern 都有，
+    所以兩邊依 pattern 編號對齊，不是依行號。
+    return : pat_ids (P,)、bad (P, per_pat) bool、golden bits、rtl bits、rtl valid
+             RTL 沒有的 pattern、少掉的行與非 hex (x / z) 的行一律算錯
+    """
+    g_bits, g_valid, g_ids = read_hex(golden_path, pat_ids=True)
+    if len(g_bits) % per_pat:
+        raise ValueError(f"{golden_path}: {len(g_bits)} 行不是 {per_pat} 的倍數")
+    g_pat, g_bits, g_valid = _pattern_rows(g_bits, g_valid, g_ids, per_pat)
+
+    r_bits = np.zeros_like(g_bits)
+    r_valid = np.zeros_like(g_valid)
+    if os.path.exists(rtl_path):
+        r_pat, bits, valid = _pattern_rows(*read_hex(rtl_path, pat_ids=True), per_pat)
+        order = np.argsort(r_pat, kind="stable")
+        pos = np.minimum(np.searchsorted(r_pat[order], g_pat), max(len(order) - 1, 0))
+        found = np.flatnonzero(r_pat[order][pos] == g_pat) if len(order) else np.zeros(0, dtype=np.int64)
+        r_bits[found] = bits[order[pos[found]]]
+        r_valid[found] = valid[order[pos[found]]]
+
+    bad = ~g_valid | ~r_valid | (ulp_distance(g_bits, r_bits) > ulp)
+    return g_pat, bad, g_bits, r_bits, r_valid
+
+
+def locate(golden_dir, rtl_dir, ulp=0):
+    """
+    return : dict of (P,) 陣列
+               pat   : pattern 編號
+               stage : 依 pipeline 順序第一個出錯的 stage 在 STAGE_NAMES 的 index (-1 表示全對)
+               line  : 該 stage 中第一個出錯的行 (pattern 內的位置)
+               golden / rtl : 該行兩邊的 bit pattern (rtl_valid 為 False 表示 RTL 沒有有效值)
+    """
+    res = None
+    for s, stage in enumerate(STAGE_NAMES):
+        name = f"golden_{stage}.dat"
+        ids, bad, g, r, rv = compare_stage(os.path.join(golden_dir, name),
+                                       os.path.join(rtl_dir, name),
+                                       LINES_PER_PAT[stage], ulp)
+        if res is None:
+            n = len(ids)
+            res = {'pat': ids, 'stage': np.full(n, -1), 'line': np.zeros(n, dtype=np.int64),
+                   'golden': np.zeros(n, dtype=np.uint32), 'rtl': np.zeros(n, dtype=np.uint32),
+                   'rtl_valid': np.zeros(n, dtype=bool)}
+        elif not np.array_equal(ids, res['pat']):
+            raise ValueError(f"{name}: pattern 順序與 golden_{STAGE_NAMES[0]}.dat 不同")
+
+        # 這個 stage 出錯、且前面的 stage 都對的 pattern
+        new = np.flatnonzero(bad.any(axis=1) & (res['stage'] < 0))
+        col = bad[new].argmax(axis=1)
+        res['stage'][new] = s
+        res['line'][new] = col
+        res['golden'][new] = g[new, col]
+        res['rtl'][new] = r[new, col]
+        res['rtl_valid'][new] = rv[new, col]
+
+    return res
+
+
+def self_check():
+    """
+    只有部分 pattern 的 golden 對每個 pattern 都有的 RTL dump：
+    pat7 在 pool 第 5 行出錯、pat15 不在 RTL 裡，其餘應全對
+    """
+    rng = np.random.default_rng(0)
+    num, picked = 20, np.array([3, 7, 15])
+    with tempfile.TemporaryDirectory() as tmp:
+        g_dir, r_dir = os.path.join(tmp, "golden"), os.path.join(tmp, "rtl")
+        os.makedirs(g_dir)
+        os.makedirs(r_dir)
+        rtl_ids = np.delete(np.arange(num), 15)
+        for stage, per_pat in LINES_PER_PAT.items():
+            labels = [f"_{stage}[{i}]" for i in range(per_pat)]
+            full = rng.random((num, per_pat), dtype=np.float32)
+            rtl = full.copy()
+            if stage == "pool":
+                rtl[7, 5] += 1
+            name = f"golden_{stage}.dat"
+            write_hex_file(os.path.join(g_dir, name), full[picked], labels=labels, pat_ids=picked)
+            write_hex_file(os.path.join(r_dir, name), rtl[rtl_ids], labels=labels, pat_ids=rtl_ids)
+        res = locate(g_dir, r_dir)
+
+    assert res['pat'].tolist() == [3, 7, 15], res['pat']
+    assert res['stage'].tolist() == [-1, STAGE_NAMES.index("pool"), 0], res['stage']
+    assert res['line'][1] == 5 and res['rtl_valid'][1] and not res['rtl_valid'][2]
+    print("✅ self-check 通過：稀疏 golden 與完整 RTL dump 依 pattern 編號對齊")
+
+
+def _fmt(bits, valid=True):
+    if not valid:
+        return "無有效值"
+    return f"{bits:08x} ({np.uint32(bits).view(np.float32):.6f})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab08 checkpoint mismatch locator")
+    parser.add_argument("--golden", default="../00_TESTBED/", help="golden_<stage>.dat 所在資料夾")
+    parser.add_argument("--rtl", help="RTL dump 所在資料夾 (檔名與格式同 golden)")
+    parser.add_argument("--ulp", type=int, default=0, help="可容忍的 ulp 誤差")
+    parser.add_argument("--self-check", action="store_true", help="用暫存檔確認比對邏輯後結束")
+    args = parser.parse_args()
+    if args.self_check:
+        self_check()
+        return
+    if args.rtl is None:
+        parser.error("需要 --rtl")
+
+    t0 = time.time()
+    res = locate(args.golden, args.rtl, args.ulp)
+    dt = time.time() - t0
+
+    fail = np.flatnonzero(res['stage'] >= 0)
+    for p in fail.tolist():
+        stage = STAGE_NAMES[res['stage'][p]]
+        img_idx, idx = divmod(int(res['line'][p]), LINES_PER_PAT[stage] // 2)
+        print(f"❌ pat{res['pat'][p]}: 第一個錯誤在 {stage} img{img_idx}[{idx}]  "
+              f"golden = {_fmt(res['golden'][p])}  rtl = {_fmt(res['rtl'][p], res['rtl_valid'][p])}")
+
+    print(f"\n比對 {len(res['pat'])} 個 pattern，{len(fail)} 個有錯 (ulp <= {args.ulp})，耗時 {dt:.2f} s")
+    counts = np.bincount(res['stage'][fail], minlength=len(STAGE_NAMES))
+    for stage, n in zip(STAGE_NAMES, counts.tolist()):
+        if n:
+            print(f"  {stage:5s}: {n}")
+
+
+if __name__ == "__main__":
+    main()
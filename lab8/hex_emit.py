@@ -0,0 +1,250 @@
+import os
+
+import numpy as np
+
+# ==========================================
+# IEEE-754 / uint32 Hex 批次輸出 / 讀取工具 (lab4 / lab7 / lab8 共用)
+#
+# 整個陣列一次 view 成 uint32，用查表把每個 nibble 轉成字元。
+# 每一行的各欄位 (hex、label、數值註解) 先各自排成定寬的 uint8 字元矩陣，
+# 加上「哪些字元有效」的 mask，接起來後一次取出 -> 整段 bytes 直接寫檔，
+# 不再逐值 struct.pack / hex() / f-string / f.write。
+# ==========================================
+
+CHUNK = 1 << 18       # 每次組字串 / 寫檔的行數
+BUF_SIZE = 1 << 22    # 檔案 buffer 大小
+
+_HEX_LOWER = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_HEX_UPPER = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+_SHIFTS = np.arange(28, -1, -4, dtype=np.uint32)
+
+
+def float_bits(values):
+    """float 陣列 -> float32 的 IEEE-754 bit pattern (uint32)；整數陣列直接視為 uint32"""
+    a = np.asarray(values)
+    if a.dtype.kind in "iu":
+        return a.astype(np.uint32).ravel()
+    return np.ascontiguousarray(a, dtype=np.float32).ravel().view(np.uint32)
+
+
+def hex_chars(values, upper=False):
+    """return (N, 8) uint8，每列為一個值的 8 位 hex 字元"""
+    bits = float_bits(values)
+    table = _HEX_UPPER if upper else _HEX_LOWER
+    return table[(bits[:, None] >> _SHIFTS) & 0xF]
+
+
+# ==========================================
+# 字元矩陣小工具：每個欄位為 (chars (N, w), mask (N, w) 或 None)
+# ==========================================
+def _const(text, n):
+    return np.broadcast_to(np.frombuffer(text.encode("ascii"), dtype=np.uint8), (n, len(text))), None
+
+
+def _digits(v, width=None):
+    """
+    非負整數 -> 靠右對齊的十進位字元，mask 去掉前導 0 (至少留一位)。
+    width 省略時取這批數字實際需要的位數，能用 uint32 就不用 int64 (除法快很多)。
+    """
+    top = int(v.max()) if len(v) else 0
+    if width is None:
+        width = len(str(top))
+    dt = np.uint32 if top < 2 ** 32 and width <= 10 else np.int64
+    v = v.astype(dt)
+    pow10 = (10 ** np.arange(width - 1, -1, -1, dtype=np.int64)).astype(dt)
+    d = (v[:, None] // pow10) % 10
+    mask = v[:, None] >= pow10
+    mask[:, -1] = True
+    return (d + ord("0")).astype(np.uint8), mask
+
+
+def _table(strings, index):
+    """少量固定字串 (例如每個 pattern 內的 label 後綴) 依 index 展開"""
+    enc = [s.encode("ascii") for s in strings]
+    width = max(len(s) for s in enc)
+    chars = np.zeros((len(enc), width), dtype=np.uint8)
+    valid = np.zeros((len(enc), width), dtype=bool)
+    for k, s in enumerate(enc):
+        chars[k, :len(s)] = np.frombuffer(s, dtype=np.uint8)
+        valid[k, :len(s)] = True
+    return chars[index], valid[index]
+
+
+def _fixed6(vals):
+    """
+    float32 -> 與 f"{val:.6f}" 完全相同的字元。
+    由 bit pattern 算出 val * 10^6 的精確值，再做 round-half-even (同 Python)。
+    """
+    bits = float_bits(vals).astype(np.int64)
+    neg = (bits >> 31) != 0
+    exp = (bits >> 23) & 0xFF
+    man = bits & 0x7FFFFF
+    m = np.where(exp == 0, man, man | (1 << 23)) * 10 ** 6
+    e = np.where(exp == 0, -149, exp - 150)
+
+    k = np.clip(-e, 1, 62)
+    q = m >> k
+    r = m & ((np.int64(1) << k) - 1)
+    half = np.int64(1) << (k - 1)
+    q = q + ((r > half) | ((r == half) & ((q & 1) == 1)))
+    q = np.where(e >= 0, m << np.clip(e, 0, 62), np.where(-e > 62, 0, q))
+
+    # val * 10^6 超過 int64 (|val| >= 2^42) 或 nan / inf 交給 Python 格式化
+    slow = (exp == 0xFF) | (e > 18)
+    q = np.where(slow, 0, q)
+
+    int_chars, int_mask = _digits(q // 10 ** 6)
+    frac_chars, _ = _digits(q % 10 ** 6, 6)
+    n, w = int_chars.shape
+    chars = np.empty((n, w + 8), dtype=np.uint8)
+    chars[:, 0] = ord("-")
+    chars[:, 1:w + 1] = int_chars
+    chars[:, w + 1] = ord(".")
+    chars[:, w + 2:] = frac_chars
+    mask = np.ones(chars.shape, dtype=bool)
+    mask[:, 0] = neg
+    mask[:, 1:w + 1] = int_mask
+
+    slow_idx = np.flatnonzero(slow)
+    if len(slow_idx):
+        strs = [f"{float(vals[idx]):.6f}".encode("ascii") for idx in slow_idx]
+        extra = max(max(len(t) for t in strs) - chars.shape[1], 0)
+        chars = np.pad(chars, ((0, 0), (extra, 0)))
+        mask = np.pad(mask, ((0, 0), (extra, 0)))
+        width = chars.shape[1]
+        for idx, t in zip(slow_idx, strs):
+            chars[idx, width - len(t):] = np.frombuffer(t, dtype=np.uint8)
+            mask[idx] = False
+            mask[idx, width - len(t):] = True
+
+    return chars, mask
+
+
+def _join(fields):
+    n = len(fields[0][0])
+    width = sum(c.shape[1] for c, _ in fields)
+    chars = np.empty((n, width), dtype=np.uint8)
+    mask = np.ones((n, width), dtype=bool)
+    col = 0
+    for c, m in fields:
+        w = c.shape[1]
+        chars[:, col:col + w] = c
+        if m is not None:
+            mask[:, col:col + w] = m
+        col += w
+    return np.compress(mask.ravel(), chars.ravel()).tobytes()
+
+
+# ==========================================
+# 整段輸出
+# ==========================================
+def hex_lines(values, prefix="", upper=False):
+    """所有值轉成 "{prefix}{hex}\\n"，回傳整段 bytes"""
+    chars = hex_chars(values, upper)
+    n = len(chars)
+    return _join([_const(prefix, n), (chars, None), _const("\n", n)])
+
+
+def annotated_lines(values, labels, start=0, pat_ids=None):
+    """
+    lab8 格式："{hex} // pat{p}{labels[j]}: {val:.6f}\\n"
+
+    每個 pattern 佔 len(labels) 行，labels 為該 pattern 內各行的 label 後綴；
+    values 是攤平後從第 start 行開始的一段。
+    pat_ids 給定時，第 k 個 pattern 的編號印成 pat_ids[k] (只輸出部分 pattern 時用)。
+    """
+    vals = np.asarray(values, dtype=np.float32).ravel()
+    n = len(vals)
+    line = np.arange(start, start + n, dtype=np.int64)
+    pat, sub = np.divmod(line, len(labels))
+
+    # pattern 編號只對這段出現過的 pattern 各轉一次
+    p0 = int(pat[0]) if n else 0
+    ids = np.arange(p0, int(pat[-1]) + 1 if n else 1)
+    if pat_ids is not None:
+        ids = np.asarray(pat_ids, dtype=np.int64)[ids]
+    pat_chars, pat_mask = _digits(ids)
+
+    return _join([(hex_chars(vals), None),
+                  _const(" // pat", n),
+                  (pat_chars[pat - p0], pat_mask[pat - p0]),
+                  _table(labels, sub),
+                  _const(": ", n),
+                  _fixed6(vals),
+                  _const("\n", n)])
+
+
+def write_hex(f, values, prefix="", upper=False, labels=None, pat_ids=None, chunk=CHUNK):
+    """
+    將 values (任意 shape，依 C order 攤平) 逐段寫入已用 'wb' 開啟的檔案 f。
+    給 labels 時輸出 annotated_lines() 的註解格式，否則為 "{prefix}{hex}"。
+    """
+    vals = np.asarray(values).ravel()
+    for s in range(0, len(vals), chunk):
+        e = min(s + chunk, len(vals))
+        if labels is None:
+            f.write(hex_lines(vals[s:e], prefix, upper))
+        else:
+            f.write(annotated_lines(vals[s:e], labels, s, pat_ids))
+
+
+def write_hex_file(path, values, **kwargs):
+    with open(path, "wb", buffering=BUF_SIZE) as f:
+        write_hex(f, values, **kwargs)
+
+
+# ==========================================
+# 讀取 (memory-map 後整檔一次解析)
+# ==========================================
+_NIBBLE = np.full(256, 0xFF, dtype=np.uint8)
+_NIBBLE[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+_NIBBLE[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+_NIBBLE[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+
+_PAT_TAG = b" // pat"
+_PAT_DIGITS = 12
+
+
+def _line_starts(buf):
+    starts = np.concatenate(([0], np.flatnonzero(buf == ord("\n")) + 1))
+    return starts[starts < len(buf)]
+
+
+def _gather(buf, pos, width):
+    # 每列從 pos 開始取 width 個字元，超出檔尾的位置補 0
+    idx = pos[:, None] + np.arange(width)
+    out = np.zeros(idx.shape, dtype=np.uint8)
+    inside = idx < len(buf)
+    out[inside] = buf[idx[inside]]
+    return out
+
+
+def read_hex(path, pat_ids=False):
+    """
+    讀 write_hex 寫出的檔案 (每行開頭 8 位 hex，其餘忽略)。
+
+    return : bits (N,) uint32、valid (N,) bool (hex 欄位含 x / z 等非 hex 字元時為 False)
+             pat_ids=True 時另回傳每行 "// pat{p}" 的 p (沒有時為 -1)
+    """
+    size = os.path.getsize(path)
+    buf = np.memmap(path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+    starts = _line_starts(buf)
+
+    nib = _NIBBLE[_gather(buf, starts, 8)]
+    valid = (nib != 0xFF).all(axis=1)
+    bits = np.zeros(len(starts), dtype=np.uint32)
+    for k in range(8):
+        bits = (bits << np.uint32(4)) | (nib[:, k] & 0xF)
+
+    if not pat_ids:
+        return bits, valid
+
+    tag = _gather(buf, starts + 8, len(_PAT_TAG))
+    has_tag = (tag == np.frombuffer(_PAT_TAG, dtype=np.uint8)).all(axis=1)
+    d = _gather(buf, starts + 8 + len(_PAT_TAG), _PAT_DIGITS).astype(np.int64) - ord("0")
+    is_digit = np.cumprod((d >= 0) & (d <= 9), axis=1).astype(bool)
+    ids = np.zeros(len(starts), dtype=np.int64)
+    for k in range(_PAT_DIGITS):
+        ids = np.where(is_digit[:, k], ids * 10 + d[:, k], ids)
+    ids[~has_tag | ~is_digit[:, 0]] = -1
+    return bits, valid, ids
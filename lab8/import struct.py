@@ -1,197 +1,186 @@
-import struct
+import argparse
 import numpy as np
-import random
 import os
 
+from snn_golden import LAB8, STAGE_NAMES, snn_forward, l1_batch
+from hex_emit import write_hex_file, BUF_SIZE
+
 # ==========================================
 # 參數設定
 # ==========================================
 PAT_NUM = 30
+SEED = 1234           # master seed，每個 pattern 的亂數由 (SEED, pattern 編號) 決定
+CHUNK = 8192          # 每次送進黃金模型的 pattern 數 (限制中間陣列大小)
 OUT_DIR = "../00_TESTBED/"
 
-# 💡 分拆成多個獨立檔案 (包含輸入測資與所有檢查點)
+# 💡 分拆成多個獨立檔案 (testbench 只讀這 5 個)
 OPT_FILE = os.path.join(OUT_DIR, "opt.dat")
 IMG_FILE = os.path.join(OUT_DIR, "img.dat")
 KER_FILE = os.path.join(OUT_DIR, "kernel.dat")
 WGT_FILE = os.path.join(OUT_DIR, "weight.dat")
 GLD_FILE = os.path.join(OUT_DIR, "golden.dat")
 
-# 檢查點檔案 (Checkpoints)
-CHK_CONV_FILE = os.path.join(OUT_DIR, "golden_conv.dat")
-CHK_EQ_FILE   = os.path.join(OUT_DIR, "golden_eq.dat")
-CHK_POOL_FILE = os.path.join(OUT_DIR, "golden_pool.dat")
-CHK_FC_FILE   = os.path.join(OUT_DIR, "golden_fc.dat")
-CHK_NORM_FILE = os.path.join(OUT_DIR, "golden_norm.dat")
-CHK_ACT_FILE  = os.path.join(OUT_DIR, "golden_act.dat")
+# 檢查點檔案 (Checkpoints)，只有 --checkpoints-for 才會寫
+CHK_FILES = {stage: os.path.join(OUT_DIR, f"golden_{stage}.dat") for stage in STAGE_NAMES}
+
+# ==========================================
+# 每個 pattern 獨立的亂數 (counter-based)
+# ==========================================
+# 第 k 個 pattern 的第 j 個亂數 = splitmix64(key(SEED, stream) + (k * slots + j) * GAMMA)，
+# 不依賴前面的 pattern 抽過多少亂數，任何 pattern 都能單獨重建。
+_GAMMA = np.uint64(0x9E3779B97F4A7C15)
 
-os.makedirs(OUT_DIR, exist_ok=True)
+# 各種資料各用一條 stream
+STREAM_OPT, STREAM_IMG, STREAM_KER, STREAM_WGT, STREAM_CORNER = range(5)
+
+def _splitmix64(x):
+    x = x + _GAMMA
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def pattern_uniform(seed, stream, pat_ids, shape, low, high):
+    """return (len(pat_ids),) + shape 的 [low, high) 亂數 (float64)"""
+    slots = int(np.prod(shape))
+    key = _splitmix64(np.array([seed * 8 + stream], dtype=np.uint64))[0]
+    ctr = np.asarray(pat_ids, dtype=np.uint64)[:, None] * np.uint64(slots) + np.arange(slots, dtype=np.uint64)
+    u = (_splitmix64(key + ctr * _GAMMA) >> np.uint64(11)) * (1.0 / (1 << 53))
+    return (low + (high - low) * u).reshape((len(ctr),) + tuple(shape))
 
 # ==========================================
-# IEEE-754 Float <-> Hex 轉換工具
+# 測資生成 (一次抽完所有 pattern)
 # ==========================================
-def float_to_hex(f):
-    f_32 = np.float32(f)
-    return hex(struct.unpack('<I', struct.pack('<f', f_32))[0])[2:].zfill(8)
+def gen_patterns(pat_ids, seed=SEED):
+    """pat_ids : 要產生的 pattern 編號，可以只挑其中幾個 (結果與整批產生時相同)"""
+    pat_ids = np.asarray(pat_ids, dtype=np.int64)
+    opt = np.floor(pattern_uniform(seed, STREAM_OPT, pat_ids, (), 0, 4)).astype(np.int64)
+    img = pattern_uniform(seed, STREAM_IMG, pat_ids, (2, 4, 4, 3), 0.5, 255.0).astype(np.float32)
+    kernel = pattern_uniform(seed, STREAM_KER, pat_ids, (3, 3, 3), 0.0, 0.5).astype(np.float32)
+    weight = pattern_uniform(seed, STREAM_WGT, pat_ids, (2, 2), 0.0, 0.5).astype(np.float32)
+
+    # Corner Case: pat % 10 == 9 的 img0 為常數圖、kernel 全為 0.1
+    corner = pat_ids % 10 == 9
+    val = pattern_uniform(seed, STREAM_CORNER, pat_ids[corner], (), 0.5, 255.0)
+    img[corner, 0] = val[:, None, None, None]
+    kernel[corner] = np.float32(0.1)
+
+    return opt, img, kernel, weight
 
 # ==========================================
-# SNN 軟體黃金模型 (符合 Lab04 & Lab08)
+# SNN 軟體黃金模型 (符合 Lab04 & Lab08，見 snn_golden.py)
 # ==========================================
-def padding_2d(img, pad_type):
-    if img.ndim == 3:
-        if pad_type == 1: # Zero
-            return np.pad(img, pad_width=((1,1), (1,1), (0,0)), mode='constant', constant_values=0)
-        else:             # Replication
-            return np.pad(img, pad_width=((1,1), (1,1), (0,0)), mode='edge')
-    else:
-        if pad_type == 1: # Zero
-            return np.pad(img, pad_width=1, mode='constant', constant_values=0)
-        else:             # Replication
-            return np.pad(img, pad_width=1, mode='edge')
+def golden_model_batch(img, kernel, weight, opt, chunk=CHUNK, checkpoints=True):
+    """
+    img    : (P, 2, 4, 4, 3)  每個 pattern 的 img0 / img1
+    kernel : (P, 3, 3, 3)
+    weight : (P, 2, 2)
+    opt    : (P,)
+    return : l1 (P,)，checkpoints {stage: (P, 2, ...)} (checkpoints=False 時為空 dict)
+    """
+    pat_num = len(img)
+    l1_parts = []
+    chk_parts = {}
+
+    for s in range(0, pat_num, chunk):
+        e = min(s + chunk, pat_num)
+        n = e - s
+        # 攤平成 (2n, 4, 4, 3)，kernel / weight / opt 每個 pattern 重複兩次
+        act, chk = snn_forward(img[s:e].reshape((2 * n,) + img.shape[2:]),
+                               np.repeat(kernel[s:e], 2, axis=0),
+                               np.repeat(weight[s:e], 2, axis=0),
+                               np.repeat(opt[s:e], 2),
+                               cfg=LAB8, checkpoints=True)
+        act = act.reshape(n, 2, -1)
+        l1_parts.append(l1_batch(act[:, 0], act[:, 1]))
+        if checkpoints:
+            for k, v in chk.items():
+                chk_parts.setdefault(k, []).append(v.reshape((n, 2) + v.shape[1:]))
+
+    l1 = np.concatenate(l1_parts)
+    return l1, {k: np.concatenate(v) for k, v in chk_parts.items()}
 
 def golden_model(img0, img1, kernel, weight, opt):
-    pad_type = opt % 2 
-    act_type = opt // 2 
-    
-    def process_image(img):
-        # 1. Conv
-        padded_img = padding_2d(img, pad_type)
-        conv_out = np.zeros((4, 4), dtype=np.float32)
-        for c in range(3):
-            for i in range(4):
-                for j in range(4):
-                    window = padded_img[i:i+3, j:j+3, c]
-                    conv_out[i,j] += np.sum(window * kernel[:,:,c], dtype=np.float32)
-                    
-        # 2. Equalization
-        eq_out = np.zeros((4, 4), dtype=np.float32)
-        padded_eq = padding_2d(conv_out, pad_type)
-        for i in range(4):
-            for j in range(4):
-                window = padded_eq[i:i+3, j:j+3]
-                eq_out[i,j] = np.sum(window, dtype=np.float32) / np.float32(9.0)
-                
-        # 3. Max Pooling
-        pool_out = np.zeros((2, 2), dtype=np.float32)
-        for i in range(2):
-            for j in range(2):
-                pool_out[i,j] = np.max(eq_out[i*2:i*2+2, j*2:j*2+2])
-                
-        # 4. FC (矩陣乘法)
-        fc_mat = np.matmul(pool_out, weight, dtype=np.float32)
-        fc_out = fc_mat.flatten()
-        
-        # 5. Normalization
-        f_max = np.max(fc_out)
-        f_min = np.min(fc_out)
-        denom = f_max - f_min
-        if denom == np.float32(0.0):
-            norm_out = np.zeros_like(fc_out, dtype=np.float32)
-        else:
-            norm_out = (fc_out - f_min) / denom
-            
-        # 6. Activation
-        if act_type == 0:
-            act_out = np.float32(1.0) / (np.float32(1.0) + np.exp(-norm_out, dtype=np.float32))
-        else:             
-            act_out = np.tanh(norm_out, dtype=np.float32)
-            
-        # 💡 將所有中間結果打包回傳
-        checkpoints = {
-            'conv': conv_out,
-            'eq': eq_out,
-            'pool': pool_out,
-            'fc': fc_out,
-            'norm': norm_out,
-            'act': act_out
-        }
-        return act_out, checkpoints
-
-    out0, chk0 = process_image(img0)
-    out1, chk1 = process_image(img1)
-    l1_dist = np.sum(np.abs(out0 - out1, dtype=np.float32), dtype=np.float32)
-    
-    return l1_dist, chk0, chk1
+    # 單一 pattern 版本 (debug 用)
+    l1, chk = golden_model_batch(np.stack([img0, img1])[None], kernel[None],
+                                 weight[None], np.array([opt]))
+    chk0 = {k: v[0, 0] for k, v in chk.items()}
+    chk1 = {k: v[0, 1] for k, v in chk.items()}
+    return l1[0], chk0, chk1
 
 # ==========================================
-# 輔助寫檔函數 (自動攤平並加上註解)
+# 每個 pattern 內各行的 label (照寫檔順序)
 # ==========================================
-def write_checkpoint(f, arr, prefix):
-    arr_flat = arr.flatten()
-    for idx, val in enumerate(arr_flat):
-        f.write(f"{float_to_hex(val)} // {prefix}[{idx}]: {val:.6f}\n")
+IMG_LABELS = [f"_img{n}[{i},{j},c{c}]" for n in range(2) for c in range(3) for i in range(4) for j in range(4)]
+KER_LABELS = [f"_kernel[{i},{j},c{c}]" for c in range(3) for i in range(3) for j in range(3)]
+WGT_LABELS = [f"_weight[{idx}]" for idx in range(4)]
+GLD_LABELS = ["_golden_L1_dist"]
+
+def checkpoint_labels(stage, size):
+    return [f"_img{n}_{stage}[{idx}]" for n in range(2) for idx in range(size)]
 
 # ==========================================
 # 產生檔案
 # ==========================================
-print(f"🚀 開始生成 {PAT_NUM} 筆測資與所有檢查點檔案...")
-
-# 同時開啟所有要寫入的檔案
-with open(OPT_FILE, 'w') as f_opt, \
-     open(IMG_FILE, 'w') as f_img, \
-     open(KER_FILE, 'w') as f_ker, \
-     open(WGT_FILE, 'w') as f_wgt, \
-     open(GLD_FILE, 'w') as f_gld, \
-     open(CHK_CONV_FILE, 'w') as f_c_conv, \
-     open(CHK_EQ_FILE, 'w') as f_c_eq, \
-     open(CHK_POOL_FILE, 'w') as f_c_pool, \
-     open(CHK_FC_FILE, 'w') as f_c_fc, \
-     open(CHK_NORM_FILE, 'w') as f_c_norm, \
-     open(CHK_ACT_FILE, 'w') as f_c_act:
-         
-    for pat in range(PAT_NUM):
-        opt = random.randint(0, 3)
-        img0 = np.random.uniform(0.5, 255.0, (4, 4, 3)).astype(np.float32)
-        img1 = np.random.uniform(0.5, 255.0, (4, 4, 3)).astype(np.float32)
-        kernel = np.random.uniform(0.0, 0.5, (3, 3, 3)).astype(np.float32)
-        weight = np.random.uniform(0.0, 0.5, (2, 2)).astype(np.float32)
-        
-        # Corner Case
-        if pat % 10 == 9:
-            val = np.random.uniform(0.5, 255.0)
-            img0 = np.full((4, 4, 3), val, dtype=np.float32)
-            kernel = np.full((3, 3, 3), 0.1, dtype=np.float32) 
-            
-        # 取得最終答案與檢查點
-        golden_ans, chk0, chk1 = golden_model(img0, img1, kernel, weight, opt)
-        
-        # --- 寫入輸入測資 ---
-        f_opt.write(f"{opt} // Option: {opt}\n")
-        
-        for img_idx, img in enumerate([img0, img1]):
-            for c in range(3):
-                for i in range(4):
-                    for j in range(4):
-                        val = img[i,j,c]
-                        f_img.write(f"{float_to_hex(val)} // pat{pat}_img{img_idx}[{i},{j},c{c}]: {val:.6f}\n")
-                        
-        for c in range(3):
-            for i in range(3):
-                for j in range(3):
-                    val = kernel[i,j,c]
-                    f_ker.write(f"{float_to_hex(val)} // pat{pat}_kernel[{i},{j},c{c}]: {val:.6f}\n")
-                    
-        weight_flat = weight.flatten()
-        for idx, w in enumerate(weight_flat):
-            f_wgt.write(f"{float_to_hex(w)} // pat{pat}_weight[{idx}]: {w:.6f}\n")
-            
-        f_gld.write(f"{float_to_hex(golden_ans)} // pat{pat}_golden_L1_dist: {golden_ans:.6f}\n")
-
-        # --- 💡 寫入中間檢查點 ---
-        # 每個 pattern 會有 img0 和 img1 兩次計算，這裡照順序寫入檔案
-        for img_idx, chk in enumerate([chk0, chk1]):
-            prefix = f"pat{pat}_img{img_idx}"
-            
-            # 1. Conv (4x4 = 16 筆)
-            write_checkpoint(f_c_conv, chk['conv'], f"{prefix}_conv")
-            # 2. Equalization (4x4 = 16 筆)
-            write_checkpoint(f_c_eq,   chk['eq'],   f"{prefix}_eq")
-            # 3. Max Pooling (2x2 = 4 筆)
-            write_checkpoint(f_c_pool, chk['pool'], f"{prefix}_pool")
-            # 4. FC (1x4 = 4 筆)
-            write_checkpoint(f_c_fc,   chk['fc'],   f"{prefix}_fc")
-            # 5. Normalization (1x4 = 4 筆)
-            write_checkpoint(f_c_norm, chk['norm'], f"{prefix}_norm")
-            # 6. Activation (1x4 = 4 筆)
-            write_checkpoint(f_c_act,  chk['act'],  f"{prefix}_act")
-
-print(f"✅ 成功生成輸入測資及 6 個階段的 Checkpoint 檔案至 {OUT_DIR}！")
\ No newline at end of file
+def write_patterns(pat_num, seed):
+    print(f"🚀 開始生成 {pat_num} 筆測資...")
+
+    opt, img, kernel, weight = gen_patterns(np.arange(pat_num), seed)
+    golden, _ = golden_model_batch(img, kernel, weight, opt, checkpoints=False)
+
+    # (img / kernel 依 channel -> row -> col 順序攤平)
+    with open(OPT_FILE, 'w', buffering=BUF_SIZE) as f_opt:
+        f_opt.write("".join([f"{o} // Option: {o}\n" for o in opt.tolist()]))
+
+    write_hex_file(IMG_FILE, img.transpose(0, 1, 4, 2, 3),    labels=IMG_LABELS)
+    write_hex_file(KER_FILE, kernel.transpose(0, 3, 1, 2),    labels=KER_LABELS)
+    write_hex_file(WGT_FILE, weight,                          labels=WGT_LABELS)
+    write_hex_file(GLD_FILE, golden,                          labels=GLD_LABELS)
+
+    # 舊的 Checkpoint 對應的是上一批測資，刪掉以免 checkpoint_diff.py 拿來比對
+    stale = [path for path in CHK_FILES.values() if os.path.exists(path)]
+    for path in stale:
+        os.remove(path)
+    if stale:
+        print(f"🧹 已刪除 {len(stale)} 個舊的 golden_*.dat，需要時請用 --checkpoints-for 重建")
+
+    print(f"✅ 成功生成輸入測資與 golden 至 {OUT_DIR}！")
+
+def write_checkpoints(pat_ids, seed):
+    """只重建指定 pattern 的輸入並輸出 6 個階段的 Checkpoint (debug 失敗 pattern 用)"""
+    pat_ids = np.asarray(pat_ids, dtype=np.int64)
+    print(f"🔍 重建 pattern {pat_ids.tolist()} 的 Checkpoint...")
+
+    opt, img, kernel, weight = gen_patterns(pat_ids, seed)
+    _, chk = golden_model_batch(img, kernel, weight, opt)
+
+    # 每個 pattern 會有 img0 和 img1 兩次計算，這裡照順序寫入檔案
+    # Conv / Eq 各 16 筆，Pool / FC / Norm / Act 各 4 筆
+    for stage, path in CHK_FILES.items():
+        size = chk[stage][0, 0].size
+        write_hex_file(path, chk[stage], labels=checkpoint_labels(stage, size), pat_ids=pat_ids)
+
+    print(f"✅ 成功生成 {len(CHK_FILES)} 個階段的 Checkpoint 檔案至 {OUT_DIR}！")
+
+def main():
+    parser = argparse.ArgumentParser(description="Lab08 SNN pattern / golden generator")
+    parser.add_argument("--pat-num", type=int, default=PAT_NUM)
+    parser.add_argument("--seed", type=int, default=SEED, help="master seed，需介於 0 與 2^61 - 1 之間 (超出範圍直接報錯)")
+    parser.add_argument("--checkpoints-for", type=int, nargs="+", metavar="PAT",
+                        help="只重建這些 pattern 的中間階段 (golden_*.dat)，不重寫測資；"
+                             "一般產生測資時會刪掉舊的 golden_*.dat")
+    args = parser.parse_args()
+    if args.pat_num < 1:
+        parser.error("--pat-num 至少要 1")
+    if not 0 <= args.seed < 1 << 61:
+        parser.error("--seed 需介於 0 與 2^61 - 1 之間 (seed * 8 + stream 要放得進 uint64)")
+    if args.checkpoints_for and min(args.checkpoints_for) < 0:
+        parser.error("--checkpoints-for 的 pattern 編號不能是負數")
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    if args.checkpoints_for:
+        write_checkpoints(args.checkpoints_for, args.seed)
+    else:
+        write_patterns(args.pat_num, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ==========================================
+# SNN 軟體黃金模型 (Lab04 / Lab08 共用)
+#
+# 所有 stage 都是 batch 版本，第 0 軸為 N：
+#   imgs    : (N, 4, 4, 3)
+#   kernels : (N, 3, 3, 3) 或 (3, 3, 3)
+#   weights : (N, 2, 2)    或 (2, 2)
+#   opt     : int 或 (N,)  pad_type = opt % 2 (1: Zero, 0: Replication)
+#                          act_type = opt // 2 (0: Sigmoid, 1: Tanh)
+#
+# 運算一律 float32，累加順序與原本逐點迴圈相同，結果 bit-identical。
+# ==========================================
+
+# ==========================================
+# Stage 開關 (各 lab 的 preset)
+# ==========================================
+# conv         : "channel" 逐 channel 加總 9 點再累加 (lab8)
+#                "flat"    27 點一次加總 (lab4)
+# equalization : 3x3 平均 (lab8 才有)
+# pool         : "2x2"     2x2 max pooling -> (2, 2) (lab8)
+#                "global"  整張 feature map 取 max (lab4)
+# fc           : "matmul"  pool @ weight (lab8)
+#                "scale"   pool * weight (lab4)
+# norm         : "exact"   max == min 時輸出 0 (lab8)
+#                "isclose" np.isclose(max, min) 時輸出 0 (lab4)
+LAB4 = dict(conv="flat",    equalization=False, pool="global", fc="scale",  norm="isclose")
+LAB8 = dict(conv="channel", equalization=True,  pool="2x2",    fc="matmul", norm="exact")
+
+STAGE_NAMES = ("conv", "eq", "pool", "fc", "norm", "act")
+
+
+def _per_sample(v, n):
+    # int 或 (N,) 的選項 -> (N,) int array
+    return np.broadcast_to(np.asarray(v, dtype=np.int64), (n,))
+
+
+def _expand(v, n, ndim):
+    # 單份 kernel / weight 廣播成 N 份
+    v = np.asarray(v, dtype=np.float32)
+    return v if v.ndim == ndim + 1 else np.broadcast_to(v, (n,) + v.shape)
+
+
+# ==========================================
+# 1. Padding
+# ==========================================
+def pad_batch(x, pad_type):
+    """x: (N, H, W) 或 (N, H, W, C)，pad_type 1 為 Zero，0 為 Replication"""
+    pad_type = _per_sample(pad_type, len(x))
+    pad_width = ((0, 0), (1, 1), (1, 1)) + ((0, 0),) * (x.ndim - 3)
+
+    zero = pad_type == 1
+    if zero.all():
+        return np.pad(x, pad_width, mode='constant', constant_values=0)
+    if not zero.any():
+        return np.pad(x, pad_width, mode='edge')
+
+    mask = zero.reshape((-1,) + (1,) * (x.ndim - 1))
+    return np.where(mask,
+                    np.pad(x, pad_width, mode='constant', constant_values=0),
+                    np.pad(x, pad_width, mode='edge'))
+
+
+# ==========================================
+# 2. Conv (cross-correlation)
+# ==========================================
+def conv_batch(padded, kernels, mode="channel"):
+    """
+    padded  : (N, H+2, W+2, C)
+    kernels : (N, kh, kw, C)
+    return  : (N, H, W)
+
+    乘積先排成連續記憶體再沿最後一軸加總，加總順序與
+    np.sum(window * kernel) 相同 (einsum 會重排累加順序，差 1 ulp)。
+    """
+    N, H, W, C = padded.shape
+    _, kh, kw, _ = kernels.shape
+    outH, outW = H - kh + 1, W - kw + 1
+
+    # (N, outH, outW, C, kh, kw)
+    win = sliding_window_view(padded, (kh, kw), axis=(1, 2))
+
+    if mode == "flat":
+        prod = np.ascontiguousarray(win.transpose(0, 1, 2, 4, 5, 3) * kernels[:, None, None])
+        return prod.reshape(N, outH, outW, kh * kw * C).sum(axis=-1, dtype=np.float32)
+
+    k = kernels.transpose(0, 3, 1, 2)[:, None, None]            # (N, 1, 1, C, kh, kw)
+    prod = np.ascontiguousarray(win * k).reshape(N, outH, outW, C, kh * kw)
+    part = prod.sum(axis=-1, dtype=np.float32)
+    out = np.zeros((N, outH, outW), dtype=np.float32)
+    for c in range(C):
+        out += part[..., c]
+    return out
+
+
+# ==========================================
+# 3. Equalization (3x3 平均，padding 同 conv)
+# ==========================================
+def equalize_batch(x, pad_type):
+    N, H, W = x.shape
+    win = sliding_window_view(pad_batch(x, pad_type), (3, 3), axis=(1, 2))
+    s = np.ascontiguousarray(win).reshape(N, H, W, 9).sum(axis=-1, dtype=np.float32)
+    return s / np.float32(9.0)
+
+
+# ==========================================
+# 4. Max Pooling
+# ==========================================
+def pool_batch(x, mode="2x2"):
+    if mode == "global":
+        return x.max(axis=(1, 2))
+    N, H, W = x.shape
+    return x.reshape(N, H // 2, 2, W // 2, 2).max(axis=(2, 4))
+
+
+# ==========================================
+# 5. FC
+# ==========================================
+def fc_batch(x, weights, mode="matmul"):
+    if mode == "scale":
+        return (x[:, None, None] * weights).reshape(len(x), -1)
+    return np.matmul(x, weights, dtype=np.float32).reshape(len(x), -1)
+
+
+# ==========================================
+# 6. Min-max Normalization
+# ==========================================
+def normalize_batch(x, mode="exact"):
+    f_max = x.max(axis=1, keepdims=True)
+    f_min = x.min(axis=1, keepdims=True)
+    denom = f_max - f_min
+    zero = np.isclose(f_min, f_max) if mode == "isclose" else denom == np.float32(0.0)
+    safe = np.where(zero, np.float32(1.0), denom)
+    return np.where(zero, np.float32(0.0), (x - f_min) / safe).astype(np.float32)
+
+
+# ==========================================
+# 7. Activation
+# ==========================================
+def activate_batch(x, act_type):
+    act_type = _per_sample(act_type, len(x))
+    tanh = act_type == 1
+    if not tanh.any():
+        return np.float32(1.0) / (np.float32(1.0) + np.exp(-x, dtype=np.float32))
+    if tanh.all():
+        return np.tanh(x, dtype=np.float32)
+
+    sig = np.float32(1.0) / (np.float32(1.0) + np.exp(-x, dtype=np.float32))
+    return np.where(tanh[:, None], np.tanh(x, dtype=np.float32), sig)
+
+
+# ==========================================
+# 8. L1 distance
+# ==========================================
+def l1_batch(a, b):
+    return np.sum(np.abs(a - b, dtype=np.float32), axis=-1, dtype=np.float32)
+
+
+# ==========================================
+# 完整流程
+# ==========================================
+def snn_forward(imgs, kernels, weights, opt, cfg=LAB8, checkpoints=False):
+    """
+    一次跑完 N 張影像的 SNN。
+
+    return : act (N, 4)
+             checkpoints=True 時另回傳 {stage: (N, ...)}，
+             key 為 STAGE_NAMES (equalization 關閉時沒有 'eq')
+    """
+    imgs = np.asarray(imgs, dtype=np.float32)
+    n = len(imgs)
+    kernels = _expand(kernels, n, 3)
+    weights = _expand(weights, n, 2)
+    opt = _per_sample(opt, n)
+    pad_type = opt % 2
+    act_type = opt // 2
+
+    chk = {}
+    chk['conv'] = x = conv_batch(pad_batch(imgs, pad_type), kernels, cfg["conv"])
+    if cfg["equalization"]:
+        chk['eq'] = x = equalize_batch(x, pad_type)
+    chk['pool'] = x = pool_batch(x, cfg["pool"])
+    chk['fc']   = x = fc_batch(x, weights, cfg["fc"])
+    chk['norm'] = x = normalize_batch(x, cfg["norm"])
+    chk['act']  = x = activate_batch(x, act_type)
+
+    if checkpoints:
+        return x, chk
+    return x